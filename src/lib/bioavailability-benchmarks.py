@@ -0,0 +1,855 @@
+"""
+BENCHMARKS DE BIODISPONIBILIDADE
+Medições de desempenho, bases e perfis sintéticos e suíte com baselines
+
+Subcomandos `benchmark-*`, `gerar-kb-sintetica` e `materializar --verificar`
+de bioavailability-reference.py, que carrega este arquivo sob demanda como
+`bioavailability_benchmarks` (`carregar_modulo_auxiliar('benchmarks')`).
+"""
+
+import contextlib
+import copy
+import gc
+import io
+import itertools
+import json
+import math
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+from bioavailability_reference import (
+    _TOLERANCIA_ORCAMENTO, AnalisadorBiodisponibilidade, ArmazenamentoDiretorio, _ler_dados_tabela, _para_json,
+    exportar_supabase, gerar_pares_exemplo, normalizar_nome
+)
+
+# numpy é importado só nos benchmarks vetorizados que o usam, como no módulo de referência
+
+# Script do CLI (o benchmark de inicialização o importa em processos novos)
+SCRIPT_REFERENCIA = Path(__file__).resolve().with_name('bioavailability-reference.py')
+
+
+# === Benchmarks de desempenho ===
+
+def benchmark_throughput_lote(n_pares=5000, lista_workers=(1, 2, 4), modo='processo', tamanho_bloco=64,
+                              tamanho_cache=1024):
+    """Medir throughput (análises/s) do modo em lote para cada número de workers
+    
+    Retorna None (falha) se algum modo devolver os resultados fora da ordem de entrada.
+    """
+    analisador = AnalisadorBiodisponibilidade(verbose=False, tamanho_cache=tamanho_cache)
+    pares = gerar_pares_exemplo(n_pares)
+    
+    print(f"=== BENCHMARK DE LOTE: {n_pares} pares, modo={modo}, bloco={tamanho_bloco} ===")
+    print(f"{'workers':>8} {'tempo (s)':>10} {'análises/s':>12} {'speedup':>8}")
+    
+    medicoes = []
+    for workers in lista_workers:
+        inicio = time.perf_counter()
+        resultados = analisador.executar_analise_lote(pares, workers=workers, modo=modo,
+                                                      tamanho_bloco=tamanho_bloco)
+        duracao = time.perf_counter() - inicio
+        
+        # Garantir ordem determinística dos resultados
+        if [r['suplemento'] for r in resultados] != [s for s, _ in pares]:
+            print(f"{workers:>8} resultados fora da ordem de entrada")
+            return None
+        
+        throughput = n_pares / duracao if duracao > 0 else float('inf')
+        speedup = throughput / medicoes[0]['throughput'] if medicoes else 1.0
+        medicoes.append({'workers': workers, 'tempo_s': round(duracao, 4),
+                         'throughput': round(throughput, 1), 'speedup': round(speedup, 2)})
+        print(f"{workers:>8} {duracao:>10.3f} {throughput:>12.1f} {speedup:>7.2f}x")
+    
+    print(f"Cache (processo principal): {analisador.estatisticas_cache()}")
+    return medicoes
+
+
+def benchmark_score_vetorizado(n_linhas=1_000_000, n_paridade=200_000, semente=42):
+    """Comparar score vetorizado e escalar; falha se algum score divergir"""
+    import numpy as np
+    
+    analisador = AnalisadorBiodisponibilidade(verbose=False, carregamento_sob_demanda=True)
+    gerador = np.random.default_rng(semente)
+    
+    # Colunas sintéticas com casos de borda: sem formas (NaN), 1.0 exato, frações .5 e o teto de 30
+    max_bio = gerador.choice(
+        np.concatenate([np.arange(0, 81) / 20, [np.nan, 1.0, 1.05, 1.15, 4.0, 185.0]]), n_linhas
+    )
+    colunas = {
+        'max_biodisponibilidade': max_bio,
+        'tem_timing': gerador.random(n_linhas) < 0.5,
+        'num_potencializadores': gerador.integers(0, 7, n_linhas),
+        'num_inibidores': gerador.integers(0, 8, n_linhas),
+        'personalizado': gerador.random(n_linhas) < 0.5
+    }
+    
+    inicio = time.perf_counter()
+    scores = analisador.calcular_score_biodisponibilidade_lote(**colunas)
+    tempo_vetorizado = time.perf_counter() - inicio
+    
+    # Paridade exata com a função escalar em análises mínimas equivalentes
+    n_paridade = min(n_paridade, n_linhas)
+    analises = [
+        {
+            'analise_formas_farmaceuticas': (
+                {} if np.isnan(colunas['max_biodisponibilidade'][i])
+                else {'formas_disponiveis': {'forma': {'biodisponibilidade': float(colunas['max_biodisponibilidade'][i])}}}
+            ),
+            'timing_otimizado': {'timing_otimo': '-'} if colunas['tem_timing'][i] else {},
+            'potencializadores_recomendados': [{}] * int(colunas['num_potencializadores'][i]),
+            'inibidores_evitar': [{}] * int(colunas['num_inibidores'][i]),
+            'recomendacoes_personalizadas': {'forma_recomendada': '-'} if colunas['personalizado'][i] else {}
+        }
+        for i in range(n_paridade)
+    ]
+    inicio = time.perf_counter()
+    escalares = [analisador.calcular_score_biodisponibilidade(analise) for analise in analises]
+    tempo_escalar = (time.perf_counter() - inicio) * n_linhas / n_paridade
+    
+    divergencias = int(np.count_nonzero(np.asarray(escalares) != scores[:n_paridade]))
+    
+    # Colunas extraídas de análises reais também devem reproduzir os scores
+    reais = analisador.executar_analise_lote(gerar_pares_exemplo(1000), workers=1)
+    colunas_reais = analisador.extrair_colunas_score(reais)
+    divergencias += int(np.count_nonzero(
+        analisador.calcular_score_biodisponibilidade_lote(**colunas_reais)
+        != np.array([a['score_biodisponibilidade'] for a in reais])
+    ))
+    
+    print(f"=== BENCHMARK DE SCORE VETORIZADO: {n_linhas} linhas ===")
+    print(f"Vetorizado: {tempo_vetorizado:.3f}s ({n_linhas / tempo_vetorizado:,.0f} linhas/s)")
+    print(f"Escalar (estimado a partir de {n_paridade} linhas): {tempo_escalar:.3f}s")
+    print(f"Speedup: {tempo_escalar / tempo_vetorizado:.1f}x")
+    print(f"Divergências de paridade: {divergencias}")
+    
+    return divergencias == 0
+
+
+def gerar_perfis_aleatorios(n_perfis, semente=42):
+    """Perfis aleatórios cobrindo idades limite, marcadores conhecidos/desconhecidos e perfis vazios"""
+    gerador = random.Random(semente)
+    condicoes = ['hipocloridria', 'doenca_celiaca', 'crohn_colite', 'sindrome_intestino_irritavel']
+    estilos = ['vegetariano', 'vegano', 'atleta', 'fumante', 'ativo']
+    idades_limite = [0, 12, 17, 17.5, 18, 30, 64, 64.9, 65, 90]
+    
+    perfis = []
+    for _ in range(n_perfis):
+        sorteio = gerador.random()
+        if sorteio < 0.02:
+            perfis.append({})
+            continue
+        perfil = {
+            'condicoes_gastro': gerador.sample(condicoes, gerador.randint(0, 2)),
+            'estilo_vida': gerador.sample(estilos, gerador.randint(0, 3))
+        }
+        if sorteio > 0.05:
+            perfil['idade'] = gerador.choice(idades_limite) if sorteio < 0.2 else gerador.randint(1, 100)
+        perfis.append(perfil)
+    return perfis
+
+
+def benchmark_personalizacao(n_perfis=1_000_000, n_paridade=200_000, semente=42):
+    """Comparar personalização vetorizada e escalar; falha se algum campo divergir"""
+    import numpy as np
+    
+    analisador = AnalisadorBiodisponibilidade(verbose=False, carregamento_sob_demanda=True)
+    perfis = gerar_perfis_aleatorios(n_perfis, semente)
+    
+    inicio = time.perf_counter()
+    colunas = analisador.gerar_recomendacoes_personalizadas_lote(perfis)
+    tempo_vetorizado = time.perf_counter() - inicio
+    
+    # Entrada já colunar (arrays booleanos), como num DataFrame de perfis
+    colunar = {'idade': np.array([p.get('idade', 30) for p in perfis], dtype=np.float64)}
+    for campo, valor in analisador.marcadores_perfil():
+        colunar[valor] = np.array([valor in map(normalizar_nome, p.get(campo, [])) for p in perfis])
+    inicio = time.perf_counter()
+    colunas_booleanas = analisador.gerar_recomendacoes_personalizadas_lote(colunar)
+    tempo_colunar = time.perf_counter() - inicio
+    
+    n_paridade = min(n_paridade, n_perfis)
+    inicio = time.perf_counter()
+    escalares = [
+        analisador.gerar_recomendacoes_personalizadas(None, perfil) if perfil else {}
+        for perfil in perfis[:n_paridade]
+    ]
+    tempo_escalar = (time.perf_counter() - inicio) * n_perfis / n_paridade
+    
+    divergencias = 0
+    for i, esperado in enumerate(escalares):
+        obtido = analisador.recomendacoes_da_linha(colunas, i)
+        if obtido != esperado:
+            divergencias += 1
+            if divergencias <= 5:
+                print(f"Divergência no perfil {perfis[i]}: {obtido} != {esperado}")
+    # Os dois formatos de entrada devem cair nos mesmos buckets (mesma célula da tabela)
+    divergencias += int((colunas['personalizado'] & (colunas['bucket'] != colunas_booleanas['bucket'])).sum())
+    
+    print(f"=== BENCHMARK DE PERSONALIZAÇÃO VETORIZADA: {n_perfis} perfis ===")
+    print(f"Vetorizado (lista de perfis): {tempo_vetorizado:.3f}s")
+    print(f"Vetorizado (colunas booleanas): {tempo_colunar:.3f}s")
+    print(f"Escalar (estimado a partir de {n_paridade} perfis): {tempo_escalar:.3f}s")
+    print(f"Speedup: {tempo_escalar / tempo_vetorizado:.1f}x (lista) / {tempo_escalar / tempo_colunar:.1f}x (colunas)")
+    print(f"Divergências de paridade: {divergencias}")
+    
+    return divergencias == 0
+
+
+def benchmark_equivalencia(n_linhas=1_000_000, n_paridade=100_000, n_suplementos=5000, semente=42):
+    """Converter um catálogo sintético para a forma padrão; falha se diferir da conversão escalar"""
+    import numpy as np
+    
+    analisador = AnalisadorBiodisponibilidade(verbose=False, carregamento_sob_demanda=True)
+    analisador.recarregar_bases_conhecimento(gerar_kb_sintetica(n_suplementos, semente=semente))
+    analisador.compilar_indices()
+    gerador = np.random.default_rng(semente)
+    
+    # Catálogo: suplemento, forma do produto e dose; ~1% de formas desconhecidas (NaN)
+    nomes = np.array(list(analisador.formas_farmaceuticas), dtype=object)
+    suplementos = nomes[gerador.integers(0, len(nomes), n_linhas)]
+    formas = np.array([
+        str(gerador.choice(list(analisador.formas_farmaceuticas[s]['formas_disponiveis']))) if sorteio >= 0.01
+        else 'forma_inexistente'
+        for s, sorteio in zip(suplementos, gerador.random(n_linhas))
+    ], dtype=object)
+    doses = gerador.choice([5.0, 25.0, 50.0, 100.0, 250.0, 500.0, 1000.0], n_linhas)
+    
+    inicio = time.perf_counter()
+    equivalentes = analisador.converter_dose(suplementos, formas, doses)
+    tempo_vetorizado = time.perf_counter() - inicio
+    
+    n_paridade = min(n_paridade, n_linhas)
+    inicio = time.perf_counter()
+    escalares = np.array([
+        analisador.converter_dose(suplementos[i], formas[i], float(doses[i])) for i in range(n_paridade)
+    ])
+    tempo_escalar = (time.perf_counter() - inicio) * n_linhas / n_paridade
+    
+    obtidos = equivalentes[:n_paridade]
+    divergencias = int(np.count_nonzero((obtidos != escalares) & ~(np.isnan(obtidos) & np.isnan(escalares))))
+    
+    print(f"=== BENCHMARK DE EQUIVALÊNCIA DE DOSES: {n_linhas} linhas, {len(nomes)} suplementos ===")
+    print(f"Vetorizado: {tempo_vetorizado:.3f}s ({n_linhas / tempo_vetorizado:,.0f} linhas/s)")
+    print(f"Escalar (estimado a partir de {n_paridade} linhas): {tempo_escalar:.3f}s")
+    print(f"Speedup: {tempo_escalar / tempo_vetorizado:.1f}x")
+    print(f"Sem equivalência (forma desconhecida): {int(np.isnan(equivalentes).sum())}")
+    print(f"Divergências de paridade: {divergencias}")
+    
+    return divergencias == 0
+
+
+def gerar_tabela_precos(analisador, semente=42):
+    """Preços sintéticos por forma: crescem com a biodisponibilidade relativa, com ruído"""
+    gerador = random.Random(semente)
+    precos = {}
+    for suplemento in analisador.formas_farmaceuticas:
+        base = gerador.uniform(10, 40)
+        padrao = analisador.converter_dose(suplemento, analisador.forma_padrao(suplemento), 1.0)
+        precos[suplemento] = {
+            forma: round(base * (padrao / analisador.converter_dose(suplemento, forma, 1.0)) ** 0.6
+                         * gerador.uniform(0.5, 2.0), 2)
+            for forma, _ in analisador.ranking_formas(suplemento)
+        }
+    return precos
+
+
+def benchmark_otimizacao(n_stacks=5000, n_suplementos=5000, n_verificacao=300, semente=42):
+    """Stacks/s dos otimizadores de formas; verifica o exato por força bruta e o guloso contra o exato"""
+    analisador = AnalisadorBiodisponibilidade(verbose=False, carregamento_sob_demanda=True)
+    analisador.recarregar_bases_conhecimento(gerar_kb_sintetica(n_suplementos, semente=semente))
+    analisador.compilar_indices()
+    precos = gerar_tabela_precos(analisador, semente)
+    gerador = random.Random(semente)
+    nomes = list(analisador.formas_farmaceuticas)
+    
+    def sortear(n, tamanhos):
+        stacks = [gerador.sample(nomes, gerador.randint(*tamanhos)) for _ in range(n)]
+        # Orçamentos entre o custo mínimo e 3x ele
+        orcamentos = [
+            round(sum(min(precos[s].values()) for s in stack) * gerador.uniform(1.0, 3.0), 2) for stack in stacks
+        ]
+        return stacks, orcamentos
+    
+    def medir(stacks, orcamentos, metodo):
+        inicio = time.perf_counter()
+        resultados = analisador.otimizar_formas_stacks_lote(stacks, precos, orcamentos, metodo)
+        return resultados, time.perf_counter() - inicio
+    
+    print(f"=== BENCHMARK DO OTIMIZADOR DE FORMAS: {n_stacks} stacks, base de {len(nomes)} suplementos ===")
+    stacks, orcamentos = sortear(n_stacks, (3, 8))
+    exatos, tempo_exato = medir(stacks, orcamentos, 'exato')
+    gulosos, tempo_guloso = medir(stacks, orcamentos, 'aproximado')
+    print(f"Stacks de 3-8: exato {n_stacks / tempo_exato:,.0f} stacks/s | aproximado {n_stacks / tempo_guloso:,.0f} stacks/s")
+    
+    razoes = [g['biodisponibilidade_total'] / e['biodisponibilidade_total'] for e, g in zip(exatos, gulosos)]
+    divergencias = sum(razao > 1 + 1e-9 for razao in razoes)
+    print(f"Aproximado / exato: média {sum(razoes) / len(razoes):.4f}, pior {min(razoes):.4f}, "
+          f"ótimo em {sum(razao >= 1 - 1e-9 for razao in razoes) / len(razoes):.1%} dos stacks")
+    
+    # Força bruta sobre todas as formas com preço (inclusive as dominadas)
+    for stack, orcamento, exato in list(zip(stacks, orcamentos, exatos))[:n_verificacao]:
+        melhor = max(
+            (sum(analisador.converter_dose(s, forma, 1.0) / analisador.converter_dose(s, None, 1.0)
+                 for s, (forma, _) in zip(stack, combinacao))
+             for combinacao in itertools.product(*(precos[s].items() for s in stack))
+             if sum(preco for _, preco in combinacao) <= orcamento + _TOLERANCIA_ORCAMENTO),
+            default=None
+        )
+        if melhor is None or abs(melhor - exato['biodisponibilidade_total']) > 1e-9 * max(1.0, melhor):
+            divergencias += 1
+    
+    grandes, orcamentos_grandes = sortear(max(1, n_stacks // 10), (40, 60))
+    _, tempo_grandes = medir(grandes, orcamentos_grandes, 'aproximado')
+    print(f"Stacks de 40-60: aproximado {len(grandes) / tempo_grandes:,.0f} stacks/s")
+    print(f"Divergências (força bruta em {min(n_verificacao, n_stacks)} stacks / guloso acima do ótimo): {divergencias}")
+    
+    return divergencias == 0
+
+
+def benchmark_exportacao(n_suplementos=160, tamanho_lote=1000, semente=42):
+    """Tempo de exportação CSV/SQL de uma execução materializada (160 suplementos ~ 100 mil linhas)"""
+    analisador = AnalisadorBiodisponibilidade(verbose=False, carregamento_sob_demanda=True)
+    analisador.recarregar_bases_conhecimento(gerar_kb_sintetica(n_suplementos, semente=semente))
+    analisador.compilar_indices()
+    
+    with tempfile.TemporaryDirectory() as diretorio:
+        tabela = analisador.materializar_tabela(Path(diretorio) / 'tabela.json.gz')
+        print(f"=== BENCHMARK DE EXPORTAÇÃO SUPABASE: {len(tabela)} pares suplemento x bucket ===")
+        for formatos in (('csv',), ('sql',)):
+            destino = Path(diretorio) / formatos[0]
+            inicio = time.perf_counter()
+            manifesto = exportar_supabase(tabela, destino, formatos, tamanho_lote)
+            duracao = time.perf_counter() - inicio
+            total = sum(manifesto['linhas'].values())
+            tamanho = sum((destino / nome).stat().st_size for nome in manifesto['arquivos'])
+            print(f"{formatos[0]}: {total} linhas em {duracao:.2f}s "
+                  f"({total / duracao:,.0f} linhas/s, {tamanho / 1024 / 1024:.1f} MiB)")
+
+
+def benchmark_incremental(n_suplementos=5000, caminho=None, semente=42):
+    """Materialização completa vs incremental após edições pontuais; falha se as tabelas diferirem"""
+    bases = gerar_kb_sintetica(n_suplementos, semente=semente)
+    nomes = list(bases['formas_farmaceuticas'])
+    
+    # Edições típicas: uma entrada nova, uma alterada e uma regra de personalização revisada
+    edicoes = {}
+    editada = copy.deepcopy(bases)
+    editada['inibidores_absorcao'].setdefault('quelantes_naturais', {})['quelante_novo'] = {
+        'fontes': ['Chá preto'], 'afeta': [nomes[len(nomes) // 2]], 'reducao': '20-40%',
+        'solucoes': ['Separar por 2h']
+    }
+    edicoes['quelante novo'] = editada
+    editada = copy.deepcopy(bases)
+    forma = next(iter(editada['formas_farmaceuticas'][nomes[-1]]['formas_disponiveis'].values()))
+    forma['biodisponibilidade'] = round(forma['biodisponibilidade'] * 1.5, 2)
+    edicoes['forma alterada'] = editada
+    editada = copy.deepcopy(bases)
+    regra = next(
+        dados for fator in editada['fatores_individuais'].values() if isinstance(fator, dict)
+        for dados in fator.values() if isinstance(dados, dict) and dados.get('recomendacoes')
+    )
+    regra['recomendacoes']['ajustes_dose'] = 'Dose revisada'
+    edicoes['regra de personalização'] = editada
+    
+    def analisador_para(conteudo):
+        analisador = AnalisadorBiodisponibilidade(verbose=False, carregamento_sob_demanda=True)
+        analisador.recarregar_bases_conhecimento(conteudo)
+        analisador.compilar_indices()
+        return analisador
+    
+    def comparavel(tabela):
+        dados = _ler_dados_tabela(tabela.caminho)
+        del dados['criado_em'], dados['recalculo']
+        return dados
+    
+    divergencias = 0
+    with tempfile.TemporaryDirectory() as diretorio:
+        caminho = Path(caminho or Path(diretorio) / 'tabela.json.gz')
+        referencia = Path(diretorio) / 'referencia.json.gz'
+        print(f"=== BENCHMARK DE REANÁLISE INCREMENTAL: base de {n_suplementos} suplementos ===")
+        for nome, editada in edicoes.items():
+            analisador_para(bases).materializar_tabela(caminho)
+            
+            analisador = analisador_para(editada)
+            inicio = time.perf_counter()
+            incremental = analisador.materializar_tabela(caminho, incremental=True)
+            tempo_incremental = time.perf_counter() - inicio
+            
+            analisador = analisador_para(editada)
+            inicio = time.perf_counter()
+            completa = analisador.materializar_tabela(referencia)
+            tempo_completo = time.perf_counter() - inicio
+            
+            igual = comparavel(incremental) == comparavel(completa)
+            divergencias += not igual
+            recalculo = incremental.recalculo
+            print(f"{nome}: completa {tempo_completo:.2f}s | incremental {tempo_incremental:.2f}s "
+                  f"({recalculo['suplementos_recalculados']} suplementos, {recalculo['buckets_recalculados']} "
+                  f"buckets recalculados) | {'idêntica' if igual else 'DIVERGENTE'}")
+    print(f"Divergências em relação à materialização completa: {divergencias}")
+    
+    return divergencias == 0
+
+
+def benchmark_memoria(n_suplementos=5000, n_perfis=4, semente=42):
+    """Memória retida e blocos alocados por análise: registros compartilhados vs cópias
+    
+    Usa uma base sintética e cache desativado, de modo que cada análise é
+    recalculada e mantida em memória, como num lote grande de resultados.
+    """
+    analisador = AnalisadorBiodisponibilidade(verbose=False, carregamento_sob_demanda=True, tamanho_cache=0)
+    analisador.recarregar_bases_conhecimento(gerar_kb_sintetica(n_suplementos, semente=semente))
+    analisador.compilar_indices()
+    perfis = gerar_populacao_perfis(n_perfis, semente=semente)
+    suplementos = list(analisador.formas_farmaceuticas)
+    
+    def medir(funcao):
+        gc.collect()
+        tracemalloc.start()
+        inicio = time.perf_counter()
+        resultado = funcao()
+        tempo = time.perf_counter() - inicio
+        retido = tracemalloc.get_traced_memory()[0]
+        blocos = sum(estatistica.count for estatistica in tracemalloc.take_snapshot().statistics('filename'))
+        tracemalloc.stop()
+        return resultado, retido, blocos, tempo
+    
+    # Registros das bases e suas vistas em dicts/listas: construídos uma vez por carga e compartilhados
+    def construir_registros():
+        for suplemento in suplementos:
+            analisador.analisar_biodisponibilidade_suplemento(suplemento)
+    
+    _, retido_registros, blocos_registros, tempo_registros = medir(construir_registros)
+    analises, retido, blocos, tempo = medir(
+        lambda: [analisador.analisar_biodisponibilidade_suplemento(s, perfil_usuario=p)
+                 for p in perfis for s in suplementos]
+    )
+    # Referência: as mesmas análises com cada estrutura aninhada copiada como dict/list
+    copias, retido_copias, blocos_copias, _ = medir(
+        lambda: [json.loads(json.dumps(analise, default=_para_json)) for analise in analises]
+    )
+    n = len(analises)
+    
+    print(f"=== BENCHMARK DE MEMÓRIA: {len(suplementos)} suplementos x {len(perfis)} perfis ({n} análises) ===")
+    print(f"Registros e vistas das bases (uma vez por carga): {retido_registros / 2**20:.1f} MiB, "
+          f"{blocos_registros} blocos, {tempo_registros:.2f}s")
+    print(f"Análises com registros compartilhados: {retido / 2**20:.1f} MiB ({retido / n:.0f} B/análise), "
+          f"{blocos} blocos ({blocos / n:.1f}/análise), {tempo:.2f}s")
+    print(f"Análises como cópias (dicts): {retido_copias / 2**20:.1f} MiB ({retido_copias / n:.0f} B/análise), "
+          f"{blocos_copias} blocos ({blocos_copias / n:.1f}/análise)")
+    print(f"Redução: {1 - retido / retido_copias:.0%} da memória, {1 - blocos / blocos_copias:.0%} dos blocos")
+    del copias
+    
+    return {'analises': n, 'bytes_registros': retido_registros, 'bytes_analises': retido,
+            'blocos_analises': blocos, 'bytes_copias': retido_copias, 'blocos_copias': blocos_copias}
+
+
+def verificar_tabela_materializada(analisador, tabela, n_perfis=2000, semente=42):
+    """Comparar a tabela com o cálculo online para todos os suplementos x perfis aleatórios"""
+    def sem_timestamp(analise):
+        analise = dict(analise, timestamp=None)
+        return json.dumps(analise, sort_keys=True, ensure_ascii=False, default=_para_json)
+    
+    perfis = [None] + gerar_perfis_aleatorios(n_perfis, semente)
+    divergencias = 0
+    for canonico in tabela.suplementos():
+        for perfil in perfis:
+            esperado = analisador.analisar_biodisponibilidade_suplemento(canonico, perfil_usuario=perfil)
+            obtido = tabela.analise(canonico, perfil_usuario=perfil)
+            if sem_timestamp(obtido) != sem_timestamp(esperado):
+                divergencias += 1
+                if divergencias <= 5:
+                    print(f"Divergência: {canonico} / {perfil}", file=sys.stderr)
+    return divergencias
+
+
+# === Bases de conhecimento e perfis sintéticos (testes em escala) ===
+
+_MECANISMOS_SINTETICOS = ['Encapsulação em fosfolipídios', 'Quelação com aminoácidos', 'Redução tamanho partícula',
+                          'Emulsificação', 'Complexação com ciclodextrina', 'Liberação entérica']
+_FONTES_SINTETICAS = ['Chá preto', 'Café', 'Cereais integrais', 'Leguminosas', 'Laticínios', 'Espinafre',
+                      'Frutas cítricas', 'Azeite', 'Abacate', 'Ovos', 'Peixe', 'Nozes']
+_TIMINGS_SINTETICOS = [
+    ('Manhã em jejum', '07:00-08:00', 'Tomar com estômago vazio'),
+    ('Manhã com refeição gordurosa', '08:00-10:00', 'Tomar com refeição'),
+    ('Com almoço', 'Com almoço', 'Tomar com refeição'),
+    ('Com jantar', 'Com jantar', 'Tomar com refeição'),
+    ('À noite', '21:00-22:00', 'Longe das refeições'),
+    ('Dividir em 2 doses', 'Com refeições', 'Tomar com refeição'),
+]
+
+
+def gerar_kb_sintetica(n_suplementos=5000, densidade_interacoes=3.0, semente=42, formas_por_suplemento=(2, 6)):
+    """Bases de conhecimento sintéticas, estruturalmente válidas e reprodutíveis
+    
+    `densidade_interacoes` é o número médio de parceiros de interação
+    (competição, inibição alimentar entre suplementos, potencialização) por
+    suplemento. Todos os campos quantitativos usam textos interpretáveis
+    por `interpretar_quantidade`. fatores_individuais é a base embutida.
+    """
+    gerador = random.Random(semente)
+    nomes = [f'Suplemento Sintético {i:05d}' for i in range(n_suplementos)]
+    
+    def faixa(minimo, maximo, unidade):
+        a = gerador.randint(minimo, maximo)
+        return f'{a}-{a + gerador.randint(1, max(1, a // 2))}{unidade}'
+    
+    formas_farmaceuticas = {}
+    timing_circadiano = {}
+    interacoes_alimentares = {}
+    for nome in nomes:
+        formas = {'forma_padrao': {
+            'biodisponibilidade': 1.0,
+            'descricao': f'{nome} padrão',
+            'problemas': ['Baixa solubilidade'],
+            'absorcao_relativa': '1x'
+        }}
+        for j in range(gerador.randint(*formas_por_suplemento) - 1):
+            bio = round(math.exp(gerador.uniform(0.1, 4.0)), 1)
+            formas[f'forma_{j + 1}'] = {
+                'biodisponibilidade': bio,
+                'descricao': f'{nome} forma {j + 1}',
+                'mecanismo': gerador.choice(_MECANISMOS_SINTETICOS),
+                'absorcao_relativa': f'{bio}x',
+                'dose_equivalente': f'{round(1000 / bio, 1)}mg = 1000mg padrão'
+            }
+        ordenadas = sorted(formas, key=lambda forma: formas[forma]['biodisponibilidade'], reverse=True)
+        formas_farmaceuticas[nome] = {
+            'formas_disponiveis': formas,
+            'recomendacao_otima': ordenadas[0],
+            'custo_beneficio': gerador.choice(ordenadas)
+        }
+        
+        if gerador.random() < 0.8:
+            timing_otimo, horario, refeicoes = gerador.choice(_TIMINGS_SINTETICOS)
+            timing_circadiano[nome] = {
+                'timing_otimo': timing_otimo,
+                'horario_ideal': horario,
+                'fatores_timing': {'refeicoes': refeicoes}
+            }
+        
+        if gerador.random() < 0.7:
+            fontes = gerador.sample(_FONTES_SINTETICAS, 4)
+            interacoes_alimentares[nome] = {
+                'potencializadores': {
+                    normalizar_nome(fontes[0]).replace(' ', '_'): {
+                        'efeito': f"Aumenta absorção em {faixa(2, 4, 'x')}",
+                        'mecanismo': gerador.choice(_MECANISMOS_SINTETICOS),
+                        'fontes': [fontes[0]]
+                    }
+                },
+                'inibidores': {
+                    normalizar_nome(fonte).replace(' ', '_'): {
+                        'efeito': f"Reduz absorção em {faixa(20, 60, '%')}",
+                        'fontes': [fonte],
+                        'recomendacao': f'Separar por {gerador.randint(1, 4)}h'
+                    }
+                    for fonte in fontes[1:]
+                },
+                'timing_alimentar': gerador.choice(['Com refeição', 'Longe das refeições', 'Com gordura'])
+            }
+    
+    # Pares interagentes: cada par conta para os dois suplementos
+    total_pares = round(densidade_interacoes * n_suplementos / 2) if n_suplementos > 1 else 0
+    competicao = {}
+    especificos = {}
+    for _ in range(total_pares):
+        a, b = gerador.sample(nomes, 2)
+        tipo = gerador.random()
+        if tipo < 0.4:
+            competicao[f'{a}_vs_{b}'] = {
+                'reducao_absorcao': faixa(10, 60, '%'),
+                'solucao': f'Separar por {gerador.randint(1, 4)}h'
+            }
+        elif tipo < 0.8 and a in interacoes_alimentares:
+            interacoes_alimentares[a]['inibidores'][b] = {
+                'efeito': f"Reduz absorção em {faixa(20, 60, '%')}",
+                'mecanismo': 'Competição por transportadores',
+                'recomendacao': f'Separar por {gerador.randint(1, 4)}h'
+            }
+        else:
+            especificos[f'{a}_para_{b}'] = {
+                'aumento_absorcao': faixa(150, 400, '%'),
+                'essencial': gerador.random() < 0.2
+            }
+    
+    universais = {
+        f'potencializador_sintetico_{i:03d}': {
+            'aplicavel_a': gerador.sample(nomes, min(len(nomes), gerador.randint(5, 50))),
+            'mecanismo': gerador.choice(_MECANISMOS_SINTETICOS),
+            'aumento_absorcao': faixa(150, 500, '%'),
+            'dose_tipica': faixa(5, 250, 'mg')
+        }
+        for i in range(max(1, n_suplementos // 50))
+    }
+    quelantes = {
+        f'quelante_sintetico_{i:03d}': {
+            'fontes': gerador.sample(_FONTES_SINTETICAS, 3),
+            'afeta': gerador.sample(nomes, min(len(nomes), gerador.randint(3, 30))),
+            'reducao': faixa(20, 70, '%'),
+            'solucoes': ['Separar timing', 'Deixar de molho']
+        }
+        for i in range(max(1, n_suplementos // 100))
+    }
+    
+    return {
+        'formas_farmaceuticas': formas_farmaceuticas,
+        'timing_circadiano': timing_circadiano,
+        'interacoes_alimentares': interacoes_alimentares,
+        'potencializadores': {'universais': universais, 'especificos': especificos},
+        'inibidores_absorcao': {'competicao_transportadores': competicao, 'quelantes_naturais': quelantes},
+        'fatores_individuais': AnalisadorBiodisponibilidade.carregar_fatores_individuais()
+    }
+
+
+def gerar_populacao_perfis(n_perfis, fatores_individuais=None, semente=42, prevalencia=0.12, proporcao_vazios=0.02):
+    """População de perfil_usuario coerente com as regras de fatores_individuais
+    
+    Idades cobrem todas as faixas das regras (com os limites exatos
+    sobre-representados); cada valor de condição/estilo aceito pelas regras
+    aparece com a `prevalencia` dada, mais valores desconhecidos ocasionais.
+    """
+    gerador = random.Random(semente)
+    fatores = fatores_individuais or AnalisadorBiodisponibilidade.carregar_fatores_individuais()
+    
+    limites = set()
+    valores = {}
+    for entradas in fatores.values():
+        for dados in entradas.values():
+            for campo, criterio in (dados.get('quando') or {}).items() if isinstance(dados, dict) else ():
+                if campo == 'idade':
+                    limites.update(limite for limite in criterio if limite is not None)
+                else:
+                    valores.setdefault(campo, []).extend(v for v in criterio if v not in valores.get(campo, ()))
+    limites = sorted(limites)
+    
+    perfis = []
+    for _ in range(n_perfis):
+        if gerador.random() < proporcao_vazios:
+            perfis.append({})
+            continue
+        if limites and gerador.random() < 0.1:
+            idade = max(0, gerador.choice(limites) - gerador.choice((0, 1)))
+        else:
+            idade = gerador.randint(1, 95)
+        perfil = {'idade': idade}
+        for campo, aceitos in valores.items():
+            escolhidos = [v for v in aceitos if gerador.random() < prevalencia / len(aceitos) * 2]
+            if gerador.random() < 0.05:
+                escolhidos.append('desconhecido')
+            perfil[campo] = escolhidos
+        perfis.append(perfil)
+    return perfis
+
+
+def gerar_entradas_sinteticas(n_entradas, bases, semente=42):
+    """Entradas {suplemento, perfil_usuario} (formato de `fluxo`) sobre uma base sintética"""
+    gerador = random.Random(semente)
+    nomes = list(bases['formas_farmaceuticas'])
+    perfis = gerar_populacao_perfis(min(n_entradas, 10000), bases.get('fatores_individuais'), semente)
+    for _ in range(n_entradas):
+        entrada = {'suplemento': gerador.choice(nomes)}
+        perfil = gerador.choice(perfis)
+        if perfil:
+            entrada['perfil_usuario'] = perfil
+        yield entrada
+
+
+def verificar_kb_sintetica(bases):
+    """Carregar a base num analisador e exercitar todos os suplementos; retorna um resumo"""
+    analisador = AnalisadorBiodisponibilidade(verbose=False, carregamento_sob_demanda=True)
+    analisador.recarregar_bases_conhecimento(bases)
+    
+    inicio = time.perf_counter()
+    analisador.compilar_indices()
+    compilacao = time.perf_counter() - inicio
+    
+    inicio = time.perf_counter()
+    for nome in bases['formas_farmaceuticas']:
+        analisador.analisar_biodisponibilidade_suplemento(nome, perfil_usuario={'idade': 70})
+    analises = time.perf_counter() - inicio
+    
+    nomes = list(bases['formas_farmaceuticas'])
+    stack = analisador.analisar_interacoes_stack(nomes[:20])
+    return {
+        'suplementos': len(nomes),
+        'compilacao_s': round(compilacao, 3),
+        'analises_s': round(analises, 3),
+        'campos_nao_interpretados': len(analisador.relatorio_normalizacao()['nao_interpretados']),
+        'suplementos_com_interacoes': len(analisador._grafo_interacoes),
+        'arestas_interacoes': sum(len(vizinhos) for vizinhos in analisador._grafo_interacoes.values()) // 2,
+        'conflitos_stack_20': len(stack['conflitos']),
+        'sinergias_stack_20': len(stack['sinergias'])
+    }
+
+
+# === Suíte de benchmarks com baselines ===
+
+def _casos_benchmark(analisador, n_entradas):
+    """Casos medidos: nome -> função sem argumentos que processa `n_entradas` itens"""
+    suplementos = list(itertools.islice(itertools.cycle(list(analisador.formas_farmaceuticas)), n_entradas))
+    perfis = gerar_populacao_perfis(n_entradas, analisador.fatores_individuais)
+    pares = list(zip(suplementos, perfis))
+    analises = [analisador.analisar_biodisponibilidade_suplemento(s, perfil_usuario=p) for s, p in pares]
+    
+    def relatorio():
+        with contextlib.redirect_stdout(io.StringIO()):
+            analisador.gerar_relatorio_biodisponibilidade(analises)
+    
+    def lote():
+        # Caches limpos: mede o trabalho real, não acertos de uma repetição anterior
+        analisador.limpar_caches()
+        analisador.executar_analise_lote(pares, workers=1)
+    
+    return {
+        'analisar_formas_farmaceuticas': lambda: [analisador.analisar_formas_farmaceuticas(s) for s in suplementos],
+        'identificar_potencializadores': lambda: [analisador.identificar_potencializadores(s) for s in suplementos],
+        'identificar_inibidores': lambda: [analisador.identificar_inibidores(s) for s in suplementos],
+        'gerar_recomendacoes_personalizadas': lambda: [
+            analisador.gerar_recomendacoes_personalizadas(s, p) for s, p in pares
+        ],
+        'calcular_score_biodisponibilidade': lambda: [
+            analisador.calcular_score_biodisponibilidade(a) for a in analises
+        ],
+        'gerar_relatorio_biodisponibilidade': relatorio,
+        'executar_analise_lote': lote,
+    }
+
+
+def executar_suite_benchmark(tamanhos_kb=(10, 500, 5000), tamanhos_entrada=(100, 1000), repeticoes=5,
+                             casos=None, semente=42):
+    """Medir cada método público para cada tamanho de base x tamanho de entrada
+    
+    As bases são sintéticas (`gerar_kb_sintetica`, mesma semente em toda
+    execução). Cada medição é a mediana de `repeticoes` execuções; resultados
+    são chaveados por 'metodo|kb=S|n=N' (S = suplementos na base).
+    """
+    resultados = {}
+    with tempfile.TemporaryDirectory() as diretorio:
+        for n_kb in tamanhos_kb:
+            analisador = AnalisadorBiodisponibilidade(verbose=False, carregamento_sob_demanda=True,
+                                                      armazenamento=ArmazenamentoDiretorio(diretorio))
+            analisador.recarregar_bases_conhecimento(gerar_kb_sintetica(n_kb, semente=semente))
+            analisador.compilar_indices()
+            n_suplementos = len(analisador.formas_farmaceuticas)
+            
+            for n_entradas in tamanhos_entrada:
+                for nome, funcao in _casos_benchmark(analisador, n_entradas).items():
+                    if casos and nome not in casos:
+                        continue
+                    funcao()  # aquecimento
+                    tempos = []
+                    for _ in range(repeticoes):
+                        inicio = time.perf_counter()
+                        funcao()
+                        tempos.append(time.perf_counter() - inicio)
+                    mediana = statistics.median(tempos)
+                    resultados[f'{nome}|kb={n_kb}|n={n_entradas}'] = {
+                        'metodo': nome,
+                        'suplementos_kb': n_suplementos,
+                        'entradas': n_entradas,
+                        'mediana_s': mediana,
+                        'minimo_s': min(tempos),
+                        'por_item_us': round(mediana / n_entradas * 1e6, 3)
+                    }
+    
+    return {
+        'formato': 1,
+        'criado_em': datetime.now().isoformat(),
+        'ambiente': {
+            'python': platform.python_version(),
+            'plataforma': platform.platform(),
+            'processador': platform.processor() or platform.machine(),
+            'cpus': os.cpu_count()
+        },
+        'repeticoes': repeticoes,
+        'resultados': resultados
+    }
+
+
+def comparar_com_baseline(atual, baseline, orcamento=0.25, piso_s=0.0005):
+    """Regressões de `atual` em relação à baseline
+    
+    Uma medição regride quando fica mais lenta que (1 + orçamento) vezes a
+    baseline e a diferença absoluta passa de `piso_s` (ruído de medições
+    muito curtas). A baseline pode trazer 'orcamentos' por método.
+    """
+    orcamentos = baseline.get('orcamentos', {})
+    regressoes = []
+    for chave, medicao in atual['resultados'].items():
+        referencia = baseline['resultados'].get(chave)
+        if referencia is None:
+            continue
+        limite = orcamentos.get(medicao['metodo'], orcamento)
+        razao = medicao['mediana_s'] / referencia['mediana_s'] if referencia['mediana_s'] > 0 else 1.0
+        if razao > 1 + limite and medicao['mediana_s'] - referencia['mediana_s'] > piso_s:
+            regressoes.append({'caso': chave, 'baseline_s': referencia['mediana_s'],
+                               'atual_s': medicao['mediana_s'], 'razao': round(razao, 2),
+                               'orcamento': limite})
+    return regressoes
+
+
+def imprimir_suite_benchmark(suite, regressoes=()):
+    """Tabela legível da suíte (e das regressões, se houver)"""
+    print(f"=== SUÍTE DE BENCHMARKS ({suite['repeticoes']} repetições, mediana) ===")
+    print(f"{'método':<36} {'supl. kb':>8} {'n':>7} {'total (ms)':>11} {'por item (µs)':>14}")
+    for medicao in suite['resultados'].values():
+        print(f"{medicao['metodo']:<36} {medicao['suplementos_kb']:>8} "
+              f"{medicao['entradas']:>7} {medicao['mediana_s'] * 1000:>11.3f} {medicao['por_item_us']:>14.3f}")
+    if regressoes:
+        print(f"\n{len(regressoes)} regressão(ões) acima do orçamento:")
+        for regressao in regressoes:
+            print(f"  {regressao['caso']}: {regressao['baseline_s'] * 1000:.3f} ms -> "
+                  f"{regressao['atual_s'] * 1000:.3f} ms ({regressao['razao']}x, orçamento "
+                  f"+{regressao['orcamento']:.0%})")
+
+
+_CODIGO_BENCHMARK_INICIALIZACAO = """
+import importlib.util, json, time
+t0 = time.perf_counter()
+spec = importlib.util.spec_from_file_location('bioavailability_reference', {caminho!r})
+modulo = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(modulo)
+t1 = time.perf_counter()
+analisador = modulo.AnalisadorBiodisponibilidade(verbose=False, carregamento_sob_demanda={sob_demanda!r})
+t2 = time.perf_counter()
+analisador.analisar_biodisponibilidade_suplemento('Iron', perfil_usuario={{'idade': 35}})
+t3 = time.perf_counter()
+print(json.dumps({{'importacao': t1 - t0, 'construcao': t2 - t1, 'primeira_analise': t3 - t2}}))
+"""
+
+
+def benchmark_inicializacao(repeticoes=10):
+    """Medir importação, construção e tempo até a primeira análise em processos novos"""
+    print(f"=== BENCHMARK DE INICIALIZAÇÃO: {repeticoes} processos por modo (mediana, ms) ===")
+    print(f"{'modo':>14} {'importação':>11} {'construção':>11} {'1ª análise':>11} {'total':>9}")
+    
+    resumo = {}
+    for sob_demanda in (False, True):
+        codigo = _CODIGO_BENCHMARK_INICIALIZACAO.format(
+            caminho=str(SCRIPT_REFERENCIA), sob_demanda=sob_demanda
+        )
+        amostras = []
+        for _ in range(repeticoes):
+            saida = subprocess.run([sys.executable, '-c', codigo], capture_output=True,
+                                   text=True, check=True).stdout
+            amostras.append(json.loads(saida.strip().splitlines()[-1]))
+        
+        medianas = {etapa: statistics.median(a[etapa] for a in amostras) * 1000
+                    for etapa in ('importacao', 'construcao', 'primeira_analise')}
+        medianas['total'] = sum(medianas.values())
+        modo = 'sob_demanda' if sob_demanda else 'imediato'
+        resumo[modo] = {etapa: round(ms, 3) for etapa, ms in medianas.items()}
+        print(f"{modo:>14} {medianas['importacao']:>11.2f} {medianas['construcao']:>11.2f} "
+              f"{medianas['primeira_analise']:>11.2f} {medianas['total']:>9.2f}")
+    
+    return resumo
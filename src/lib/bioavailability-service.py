@@ -0,0 +1,477 @@
+"""
+SERVIÇO HTTP DE BIODISPONIBILIDADE
+Serviço local (asyncio) com micro-lotes sobre o AnalisadorBiodisponibilidade
+
+Subcomandos `servidor` e `teste-carga` de bioavailability-reference.py, que
+carrega este arquivo sob demanda como `bioavailability_service`
+(`carregar_modulo_auxiliar('service')`).
+"""
+
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+from collections import deque
+from pathlib import Path
+from urllib.parse import parse_qs, quote, unquote, urlsplit
+
+from bioavailability_reference import (
+    SUPLEMENTOS_PRIORITARIOS, AnalisadorBiodisponibilidade, PerfilInvalido, _para_json, _tarefa_analise,
+    _tarefa_stack, gerar_pares_exemplo, validar_idade
+)
+
+# Script do CLI (o teste de carga sobe o servidor num processo à parte)
+SCRIPT_REFERENCIA = Path(__file__).resolve().with_name('bioavailability-reference.py')
+
+
+def _tarefa_servico(analisador, item):
+    """Tarefa do serviço: executar e já serializar a resposta (um erro não derruba o lote)"""
+    tarefa, carga = item
+    try:
+        return 200, json.dumps(tarefa(analisador, carga), ensure_ascii=False, separators=(',', ':'),
+                               default=_para_json).encode('utf-8')
+    except PerfilInvalido as erro:
+        return 400, json.dumps({'erro': f'Requisição inválida: {erro}'}, ensure_ascii=False).encode('utf-8')
+    except Exception as erro:
+        return 500, json.dumps({'erro': f'{type(erro).__name__}: {erro}'}, ensure_ascii=False).encode('utf-8')
+
+
+def _percentis_ms(amostras, quantis=(50, 90, 99)):
+    """Percentis (ms) de uma coleção de durações em segundos"""
+    ordenadas = sorted(amostras)
+    if not ordenadas:
+        return {f'p{q}': None for q in quantis}
+    return {
+        f'p{q}': round(ordenadas[min(len(ordenadas) - 1, int(len(ordenadas) * q / 100))] * 1000, 3)
+        for q in quantis
+    }
+
+
+class DespachanteMicroLote:
+    """Agrupar requisições concorrentes numa janela curta e despachar cada lote ao pool
+    
+    O primeiro item de um lote espera no máximo `janela_ms` por companhia; o
+    lote segue assim que a janela fecha ou atinge `tamanho_max_lote`. No
+    máximo `max_lotes_pendentes` lotes ficam no pool ao mesmo tempo.
+    """
+    
+    def __init__(self, executor, processar, janela_ms=2.0, tamanho_max_lote=128, max_lotes_pendentes=4):
+        self._executor = executor
+        self._processar = processar
+        self.janela = janela_ms / 1000
+        self.tamanho_max_lote = tamanho_max_lote
+        self._fila = asyncio.Queue()
+        self._vagas = asyncio.Semaphore(max_lotes_pendentes)
+        self.lotes_despachados = 0
+        self.itens_despachados = 0
+        self.maior_lote = 0
+    
+    async def submeter(self, tarefa, carga):
+        """Enfileirar um item; retorna (status, corpo JSON) quando o lote dele terminar"""
+        futuro = asyncio.get_running_loop().create_future()
+        self._fila.put_nowait(((tarefa, carga), futuro))
+        return await futuro
+    
+    async def executar(self):
+        """Laço de coleta: forma lotes e os despacha sem bloquear o event loop"""
+        while True:
+            lote = [await self._fila.get()]
+            if self.janela > 0 and self._fila.qsize() < self.tamanho_max_lote - 1:
+                await asyncio.sleep(self.janela)
+            while len(lote) < self.tamanho_max_lote and not self._fila.empty():
+                lote.append(self._fila.get_nowait())
+            
+            await self._vagas.acquire()
+            asyncio.ensure_future(self._despachar(lote))
+    
+    async def _despachar(self, lote):
+        self.lotes_despachados += 1
+        self.itens_despachados += len(lote)
+        self.maior_lote = max(self.maior_lote, len(lote))
+        try:
+            resultados = await asyncio.get_running_loop().run_in_executor(
+                self._executor, self._processar, _tarefa_servico, [item for item, _ in lote]
+            )
+        except Exception as erro:
+            for _, futuro in lote:
+                if not futuro.done():
+                    futuro.set_exception(erro)
+        else:
+            for (_, futuro), resultado in zip(lote, resultados):
+                if not futuro.done():
+                    futuro.set_result(resultado)
+        finally:
+            self._vagas.release()
+
+
+class ServidorBiodisponibilidade:
+    """Serviço HTTP/1.1 local (somente biblioteca padrão) sobre um analisador compartilhado
+    
+    Rotas:
+      GET  /saude                    estado, versão e hash das bases
+      GET  /metricas                 contadores, latências e tamanho dos lotes
+      GET  /suplementos/<nome>       análise (?idade=&condicoes_gastro=a,b&estilo_vida=&condicao_saude=)
+      POST /analise                  {"suplemento", "perfil_usuario", "condicao_saude"}
+      POST /stack                    {"suplementos": [...]} ou lista
+      POST /lote                     {"itens": [...]} ou lista de entradas de /analise
+    """
+    
+    TAMANHO_MAXIMO_CORPO = 10 * 1024 * 1024
+    STATUS_HTTP = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+                   413: 'Payload Too Large', 500: 'Internal Server Error'}
+    
+    def __init__(self, analisador, workers=None, modo='thread', janela_ms=2.0, tamanho_max_lote=128,
+                 amostras_latencia=10000):
+        self.analisador = analisador
+        self.workers = workers or os.cpu_count() or 1
+        self.modo = modo
+        self.janela_ms = janela_ms
+        self.tamanho_max_lote = tamanho_max_lote
+        self._latencias = deque(maxlen=amostras_latencia)
+        self._por_rota = {}
+        self._por_status = {}
+        self._em_andamento = 0
+        self._inicio = time.time()
+        self._executor = None
+        self._despachante = None
+    
+    async def iniciar(self, host='127.0.0.1', porta=8080):
+        """Criar o pool, o despachante e o socket de escuta (retorna o asyncio.Server)"""
+        # Índices compilados antes da primeira requisição (threads compartilham este analisador)
+        self.analisador.compilar_indices()
+        self._executor, processar = self.analisador._criar_executor(self.workers, self.modo)
+        self._despachante = DespachanteMicroLote(
+            self._executor, processar, self.janela_ms, self.tamanho_max_lote, max_lotes_pendentes=self.workers * 2
+        )
+        self._tarefa_despachante = asyncio.ensure_future(self._despachante.executar())
+        return await asyncio.start_server(self._atender, host, porta, backlog=1024)
+    
+    async def servir(self, host='127.0.0.1', porta=8080, pronto=None):
+        """Servir até ser cancelado; `pronto(servidor)` é chamado quando a porta estiver aberta"""
+        servidor = await self.iniciar(host, porta)
+        if pronto is not None:
+            pronto(servidor)
+        try:
+            async with servidor:
+                await servidor.serve_forever()
+        finally:
+            self._tarefa_despachante.cancel()
+            self._executor.shutdown(wait=False, cancel_futures=True)
+    
+    async def _atender(self, leitor, escritor):
+        """Conexão HTTP/1.1 com keep-alive"""
+        try:
+            while True:
+                linha = await leitor.readline()
+                if not linha:
+                    break
+                try:
+                    metodo, alvo, versao = linha.decode('latin-1').split()
+                except ValueError:
+                    await self._recusar(escritor, 400, 'Linha de requisição inválida')
+                    break
+                
+                cabecalhos = {}
+                while True:
+                    linha = await leitor.readline()
+                    if linha in (b'\r\n', b'\n', b''):
+                        break
+                    nome, _, valor = linha.decode('latin-1').partition(':')
+                    cabecalhos[nome.strip().lower()] = valor.strip()
+                
+                conexao = cabecalhos.get('connection', '').lower()
+                manter = conexao != 'close' if versao == 'HTTP/1.1' else conexao == 'keep-alive'
+                
+                tamanho = cabecalhos.get('content-length') or '0'
+                # Só dígitos ASCII: int() aceitaria sinal, espaços e '_'
+                if not (tamanho.isascii() and tamanho.isdigit()):
+                    await self._recusar(escritor, 400, f'Content-Length inválido: {tamanho!r}')
+                    break
+                tamanho = int(tamanho)
+                if tamanho > self.TAMANHO_MAXIMO_CORPO:
+                    await self._recusar(escritor, 413, 'Corpo da requisição muito grande')
+                    break
+                corpo = await leitor.readexactly(tamanho) if tamanho else b''
+                
+                inicio = time.perf_counter()
+                self._em_andamento += 1
+                try:
+                    rota, status, resposta = await self._rotear(metodo, alvo, corpo)
+                except Exception as erro:
+                    rota, status, resposta = 'erro', 500, {'erro': f'{type(erro).__name__}: {erro}'}
+                finally:
+                    self._em_andamento -= 1
+                
+                await self._responder(escritor, status, resposta, manter)
+                self._latencias.append(time.perf_counter() - inicio)
+                self._por_rota[rota] = self._por_rota.get(rota, 0) + 1
+                self._por_status[status] = self._por_status.get(status, 0) + 1
+                if not manter:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            escritor.close()
+    
+    async def _recusar(self, escritor, status, erro):
+        """Responder a uma requisição malformada (a conexão é encerrada em seguida), contando-a nas métricas"""
+        await self._responder(escritor, status, {'erro': erro}, False)
+        self._por_rota['invalida'] = self._por_rota.get('invalida', 0) + 1
+        self._por_status[status] = self._por_status.get(status, 0) + 1
+    
+    async def _responder(self, escritor, status, resposta, manter):
+        tipo = 'application/json; charset=utf-8'
+        if isinstance(resposta, str):
+            # Texto puro (formato de exposição do Prometheus)
+            tipo = 'text/plain; version=0.0.4; charset=utf-8'
+            resposta = resposta.encode('utf-8')
+        elif not isinstance(resposta, bytes):
+            resposta = json.dumps(resposta, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        escritor.write(
+            f"HTTP/1.1 {status} {self.STATUS_HTTP.get(status, '')}\r\n"
+            f"Content-Type: {tipo}\r\n"
+            f"Content-Length: {len(resposta)}\r\n"
+            f"Connection: {'keep-alive' if manter else 'close'}\r\n\r\n".encode('latin-1') + resposta
+        )
+        await escritor.drain()
+    
+    async def _rotear(self, metodo, alvo, corpo):
+        """Retorna (rota, status, corpo da resposta)"""
+        partes = urlsplit(alvo)
+        caminho = partes.path.rstrip('/') or '/'
+        esperado = 'GET' if caminho in ('/saude', '/metricas') or caminho.startswith('/suplementos/') else 'POST'
+        rota = caminho if not caminho.startswith('/suplementos/') else '/suplementos'
+        if rota not in ('/saude', '/metricas', '/suplementos', '/analise', '/stack', '/lote'):
+            return 'desconhecida', 404, {'erro': f'Rota desconhecida: {caminho}'}
+        if metodo != esperado:
+            return rota, 405, {'erro': f'Use {esperado} em {rota}'}
+        
+        if rota == '/saude':
+            return rota, 200, {'status': 'ok', **self.analisador.versao_kb_ativa()}
+        if rota == '/metricas':
+            if parse_qs(partes.query).get('formato') == ['prometheus']:
+                return rota, 200, self.analisador.metricas_prometheus()
+            return rota, 200, self.metricas()
+        
+        if rota == '/suplementos':
+            consulta = {chave: valores[-1] for chave, valores in parse_qs(partes.query).items()}
+            perfil = {}
+            if 'idade' in consulta:
+                try:
+                    perfil['idade'] = validar_idade(float(consulta['idade']))
+                except ValueError:
+                    return rota, 400, {'erro': f"Idade inválida: {consulta['idade']!r} (use um número finito >= 0)"}
+            for campo in ('condicoes_gastro', 'estilo_vida'):
+                if consulta.get(campo):
+                    perfil[campo] = consulta[campo].split(',')
+            item = (unquote(caminho[len('/suplementos/'):]), perfil or None, consulta.get('condicao_saude'))
+            status, resposta = await self._despachante.submeter(_tarefa_analise, item)
+            return rota, status, resposta
+        
+        try:
+            dados = json.loads(corpo or b'null')
+        except ValueError:
+            return rota, 400, {'erro': 'JSON inválido'}
+        
+        try:
+            if rota == '/stack':
+                suplementos = dados.get('suplementos') if isinstance(dados, dict) else dados
+                if not isinstance(suplementos, list):
+                    raise ValueError("Informe 'suplementos' como lista")
+                status, resposta = await self._despachante.submeter(_tarefa_stack, suplementos)
+                return rota, status, resposta
+            
+            entradas = [dados] if rota == '/analise' else (
+                dados.get('itens') if isinstance(dados, dict) else dados
+            )
+            if not isinstance(entradas, list):
+                raise ValueError("Informe 'itens' como lista")
+            itens = [
+                (entrada, None) if isinstance(entrada, str) else
+                (entrada['suplemento'], entrada.get('perfil_usuario'), entrada.get('condicao_saude'))
+                for entrada in entradas
+            ]
+        except (ValueError, KeyError, TypeError, AttributeError) as erro:
+            return rota, 400, {'erro': f'Requisição inválida: {erro}'}
+        
+        respostas = await asyncio.gather(*(self._despachante.submeter(_tarefa_analise, item) for item in itens))
+        if rota == '/analise':
+            return (rota, *respostas[0])
+        status = max(status for status, _ in respostas) if respostas else 200
+        return rota, status, b'[' + b','.join(resposta for _, resposta in respostas) + b']'
+    
+    def metricas(self):
+        """Contadores do serviço, latências recentes e tamanho dos lotes"""
+        despachante = self._despachante
+        metricas = {
+            'tempo_ativo_s': round(time.time() - self._inicio, 1),
+            'modo': self.modo,
+            'workers': self.workers,
+            'janela_ms': self.janela_ms,
+            'requisicoes': sum(self._por_rota.values()),
+            'em_andamento': self._em_andamento,
+            'por_rota': dict(self._por_rota),
+            'por_status': {str(status): total for status, total in self._por_status.items()},
+            'latencia_ms': _percentis_ms(self._latencias),
+            'lotes_despachados': despachante.lotes_despachados if despachante else 0,
+            'itens_despachados': despachante.itens_despachados if despachante else 0,
+            'tamanho_medio_lote': round(despachante.itens_despachados / despachante.lotes_despachados, 2)
+            if despachante and despachante.lotes_despachados else 0,
+            'maior_lote': despachante.maior_lote if despachante else 0
+        }
+        if self.modo == 'thread':
+            metricas['cache'] = self.analisador.estatisticas_cache()
+            if self.analisador.instrumentacao is not None:
+                metricas['etapas'] = self.analisador.instrumentacao.resumo()['etapas']
+        return metricas
+
+
+def servir_http(host='127.0.0.1', porta=8080, workers=None, modo='thread', janela_ms=2.0, tamanho_max_lote=128,
+                fonte_kb=None, tabela_materializada=None, instrumentar=False, cache_persistente=None):
+    """Executar o serviço HTTP até Ctrl+C"""
+    analisador = AnalisadorBiodisponibilidade(verbose=False, carregamento_sob_demanda=True, fonte_kb=fonte_kb,
+                                              tabela_materializada=tabela_materializada,
+                                              cache_persistente=cache_persistente)
+    if tabela_materializada:
+        analisador.usar_tabela_materializada(tabela_materializada)
+    if instrumentar:
+        analisador.ativar_instrumentacao()
+    servico = ServidorBiodisponibilidade(analisador, workers, modo, janela_ms, tamanho_max_lote)
+    
+    def pronto(servidor):
+        enderecos = ', '.join(f'{s.getsockname()[0]}:{s.getsockname()[1]}' for s in servidor.sockets)
+        print(f"Serviço de biodisponibilidade em {enderecos} ({modo}, {servico.workers} workers)",
+              file=sys.stderr, flush=True)
+    
+    try:
+        asyncio.run(servico.servir(host, porta, pronto))
+    except KeyboardInterrupt:
+        pass
+    if cache_persistente is not None:
+        cache_persistente.fechar()
+
+
+async def _cliente_carga(host, porta, requisicoes, proxima, latencias, erros):
+    """Uma conexão keep-alive enviando requisições até a lista acabar"""
+    leitor, escritor = await asyncio.open_connection(host, porta)
+    try:
+        while True:
+            indice = next(proxima, None)
+            if indice is None:
+                break
+            metodo, caminho, corpo = requisicoes[indice]
+            inicio = time.perf_counter()
+            escritor.write(
+                f"{metodo} {caminho} HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+                f"Content-Length: {len(corpo)}\r\n\r\n".encode('latin-1') + corpo
+            )
+            await escritor.drain()
+            status = int((await leitor.readline()).split()[1])
+            tamanho = 0
+            while True:
+                linha = await leitor.readline()
+                if linha in (b'\r\n', b''):
+                    break
+                nome, _, valor = linha.decode('latin-1').partition(':')
+                if nome.strip().lower() == 'content-length':
+                    tamanho = int(valor)
+            await leitor.readexactly(tamanho)
+            latencias.append(time.perf_counter() - inicio)
+            if status != 200:
+                erros[status] = erros.get(status, 0) + 1
+    finally:
+        escritor.close()
+
+
+def teste_carga_http(url=None, requisicoes=5000, concorrencia=32, rota='analise', workers=None, modo='thread',
+                     janela_ms=2.0):
+    """Teste de carga local: latência p50/p99 e throughput do serviço HTTP
+    
+    Sem `url`, sobe o serviço num subprocesso em porta livre (totalmente offline).
+    """
+    processo = None
+    if url is None:
+        with socket.socket() as sock:
+            sock.bind(('127.0.0.1', 0))
+            porta = sock.getsockname()[1]
+        comando = [sys.executable, str(SCRIPT_REFERENCIA), 'servidor', '--porta', str(porta),
+                   '--modo', modo, '--janela-ms', str(janela_ms)]
+        if workers:
+            comando += ['--workers', str(workers)]
+        processo = subprocess.Popen(comando, stderr=subprocess.DEVNULL)
+        host = '127.0.0.1'
+        limite = time.time() + 30
+        while True:
+            try:
+                socket.create_connection((host, porta), timeout=0.5).close()
+                break
+            except OSError:
+                if time.time() > limite or processo.poll() is not None:
+                    processo.kill()
+                    raise RuntimeError("Serviço HTTP não iniciou")
+                time.sleep(0.05)
+    else:
+        partes = urlsplit(url)
+        host, porta = partes.hostname, partes.port or 80
+    
+    # Requisições pré-serializadas: o cliente mede só o serviço
+    pares = gerar_pares_exemplo(requisicoes)
+    if rota == 'analise':
+        lista = [('POST', '/analise', json.dumps({'suplemento': s, 'perfil_usuario': p}).encode())
+                 for s, p in pares]
+    elif rota == 'suplemento':
+        lista = [('GET', f"/suplementos/{quote(s)}?idade={p.get('idade', 30)}"
+                         f"&condicoes_gastro={','.join(p.get('condicoes_gastro', []))}", b'')
+                 for s, p in pares]
+    elif rota == 'stack':
+        lista = [('POST', '/stack', json.dumps({'suplementos': [
+            SUPLEMENTOS_PRIORITARIOS[(i + k) % len(SUPLEMENTOS_PRIORITARIOS)] for k in range(4)
+        ]}).encode()) for i in range(requisicoes)]
+    else:
+        raise ValueError(f"Rota de teste inválida: {rota}")
+    
+    latencias = []
+    erros = {}
+    
+    async def executar():
+        proxima = iter(range(len(lista)))
+        await asyncio.gather(*(
+            _cliente_carga(host, porta, lista, proxima, latencias, erros) for _ in range(concorrencia)
+        ))
+    
+    try:
+        inicio = time.perf_counter()
+        asyncio.run(executar())
+        duracao = time.perf_counter() - inicio
+        
+        with urllib.request.urlopen(f'http://{host}:{porta}/metricas', timeout=10) as resposta:
+            metricas = json.load(resposta)
+    finally:
+        if processo is not None:
+            processo.terminate()
+            processo.wait()
+    
+    resultado = {
+        'rota': rota,
+        'requisicoes': len(latencias),
+        'concorrencia': concorrencia,
+        'duracao_s': round(duracao, 3),
+        'throughput_rps': round(len(latencias) / duracao, 1),
+        'latencia_ms': _percentis_ms(latencias),
+        'erros': erros,
+        'tamanho_medio_lote': metricas.get('tamanho_medio_lote'),
+        'maior_lote': metricas.get('maior_lote')
+    }
+    print(f"=== TESTE DE CARGA HTTP ({rota}): {resultado['requisicoes']} requisições, "
+          f"concorrência {concorrencia} ===")
+    print(f"Throughput: {resultado['throughput_rps']:.0f} req/s em {duracao:.2f}s")
+    print(f"Latência p50: {resultado['latencia_ms']['p50']} ms | p90: {resultado['latencia_ms']['p90']} ms | "
+          f"p99: {resultado['latencia_ms']['p99']} ms")
+    print(f"Lotes no servidor: média {resultado['tamanho_medio_lote']} itens, maior {resultado['maior_lote']}")
+    if erros:
+        print(f"Erros por status: {erros}")
+    return resultado
@@ -0,0 +1,76 @@
+-- Precomputed bioavailability analyses exported by the Python reference
+-- (bioavailability-reference.py exportar-supabase)
+
+-- One row per supplement: profile-independent analysis and unpersonalized score
+CREATE TABLE public.bioavailability_analyses (
+  supplement_id TEXT NOT NULL PRIMARY KEY,
+  app_supplement_id TEXT REFERENCES public.supplements(id) ON DELETE SET NULL,
+  kb_hash TEXT NOT NULL,
+  bioavailability_score NUMERIC NOT NULL DEFAULT 0,
+  optimal_form TEXT,
+  cost_benefit_form TEXT,
+  analysis JSONB NOT NULL DEFAULT '{}'::jsonb,
+  created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now()
+);
+
+-- Distinct personalized recommendation sets, shared by many profile buckets
+CREATE TABLE public.bioavailability_personalizations (
+  personalization_id INTEGER NOT NULL PRIMARY KEY,
+  kb_hash TEXT NOT NULL,
+  recommendations JSONB NOT NULL DEFAULT '{}'::jsonb,
+  created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now()
+);
+
+-- Score for every (supplement, profile bucket) pair
+CREATE TABLE public.bioavailability_profile_scores (
+  supplement_id TEXT NOT NULL,
+  profile_bucket INTEGER NOT NULL,
+  age_band SMALLINT NOT NULL,
+  marker_mask INTEGER NOT NULL,
+  personalization_id INTEGER NOT NULL,
+  bioavailability_score NUMERIC NOT NULL DEFAULT 0,
+  PRIMARY KEY (supplement_id, profile_bucket)
+);
+
+-- The reference keys analyses by its canonical ID (e.g. 'Vitamin D'), not by supplements.id
+COMMENT ON COLUMN public.bioavailability_analyses.supplement_id IS
+  'Canonical supplement ID of the Python knowledge base (e.g. ''Vitamin D''); not a supplements.id';
+COMMENT ON COLUMN public.bioavailability_analyses.app_supplement_id IS
+  'supplements.id of the same supplement, set by the load scripts from the exporter mapping '
+  '(IDS_SUPLEMENTOS_APP or --mapa-suplementos) joined with supplements; NULL when unmapped';
+COMMENT ON COLUMN public.bioavailability_profile_scores.supplement_id IS
+  'Canonical supplement ID (bioavailability_analyses.supplement_id)';
+COMMENT ON COLUMN public.bioavailability_profile_scores.profile_bucket IS
+  'age_band << bits_perfil | marker_mask; band limits and marker bits are in the export manifest (layout_perfil)';
+COMMENT ON COLUMN public.bioavailability_profile_scores.age_band IS
+  'Number of layout_perfil.limites_idade values <= the profile age (0 = youngest band)';
+COMMENT ON COLUMN public.bioavailability_profile_scores.marker_mask IS
+  'OR of layout_perfil.bits_marcadores for the profile markers (field, normalized value)';
+
+-- Enable RLS
+ALTER TABLE public.bioavailability_analyses ENABLE ROW LEVEL SECURITY;
+ALTER TABLE public.bioavailability_personalizations ENABLE ROW LEVEL SECURITY;
+ALTER TABLE public.bioavailability_profile_scores ENABLE ROW LEVEL SECURITY;
+
+-- Create policies for public viewing
+CREATE POLICY "Bioavailability analyses are publicly viewable"
+ON public.bioavailability_analyses
+FOR SELECT
+USING (true);
+
+CREATE POLICY "Bioavailability personalizations are publicly viewable"
+ON public.bioavailability_personalizations
+FOR SELECT
+USING (true);
+
+CREATE POLICY "Bioavailability profile scores are publicly viewable"
+ON public.bioavailability_profile_scores
+FOR SELECT
+USING (true);
+
+-- Create indexes for performance
+CREATE INDEX idx_bioavailability_analyses_score ON public.bioavailability_analyses(bioavailability_score);
+CREATE INDEX idx_bioavailability_profile_scores_personalization ON public.bioavailability_profile_scores(personalization_id);
+CREATE INDEX idx_bioavailability_analyses_app_supplement ON public.bioavailability_analyses(app_supplement_id);
+CREATE INDEX idx_bioavailability_profile_scores_decoded
+  ON public.bioavailability_profile_scores(supplement_id, age_band, marker_mask);
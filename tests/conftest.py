@@ -0,0 +1,34 @@
+import importlib.util
+import sys
+from pathlib import Path
+
+import pytest
+
+CAMINHO_REFERENCIA = Path(__file__).resolve().parents[1] / 'src' / 'lib' / 'bioavailability-reference.py'
+
+
+def carregar_referencia():
+    """Importar o script de referência (o hífen no nome impede o import direto)"""
+    modulo = sys.modules.get('bioavailability_reference')
+    if modulo is None:
+        spec = importlib.util.spec_from_file_location('bioavailability_reference', CAMINHO_REFERENCIA)
+        modulo = importlib.util.module_from_spec(spec)
+        # Registrado antes de executar: workers de processo resolvem as funções por este nome
+        sys.modules['bioavailability_reference'] = modulo
+        spec.loader.exec_module(modulo)
+    return modulo
+
+
+@pytest.fixture(scope='session')
+def ref():
+    return carregar_referencia()
+
+
+@pytest.fixture(scope='session')
+def servico(ref):
+    return ref.carregar_modulo_auxiliar('service')
+
+
+@pytest.fixture(scope='session')
+def benchmarks(ref):
+    return ref.carregar_modulo_auxiliar('benchmarks')
@@ -0,0 +1,136 @@
+import json
+import random
+import statistics
+from collections import Counter
+
+import pytest
+
+
+def _analises(n, semente):
+    """Análises mínimas com scores contínuos e nomes de frequência desigual (poucos muito comuns)"""
+    gerador = random.Random(semente)
+    nomes = [f'item_{i:03d}' for i in range(300)]
+    pesos = [1 / (i + 1) for i in range(len(nomes))]
+    return [
+        {
+            'suplemento': f'suplemento_{i}',
+            'score_biodisponibilidade': round(gerador.uniform(0, 100), 3),
+            'potencializadores_recomendados': [{'nome': nome} for nome in gerador.choices(nomes, pesos, k=3)],
+            'inibidores_evitar': [{'nome': nome} for nome in gerador.choices(nomes, pesos, k=2)]
+        }
+        for i in range(n)
+    ]
+
+
+def _agregar(ref, analises, **parametros):
+    agregador = ref.AgregadorEstatisticas(**parametros)
+    for analise in analises:
+        agregador.atualizar(analise)
+    return agregador
+
+
+def _em_shards(ref, analises, cortes, via_json=False, **parametros):
+    """Agregar cada fatia [cortes[i], cortes[i+1]) à parte e mesclar (opcionalmente via estado JSON)"""
+    total = ref.AgregadorEstatisticas(**parametros)
+    for inicio, fim in zip(cortes, cortes[1:]):
+        parcial = _agregar(ref, analises[inicio:fim], **parametros)
+        if via_json:
+            parcial = ref.AgregadorEstatisticas.de_estado(json.loads(json.dumps(parcial.para_estado())))
+        total.mesclar(parcial)
+    return total
+
+
+@pytest.fixture(scope='module')
+def analises():
+    return _analises(2000, semente=5)
+
+
+# Shards desiguais, com shards vazios no início, no meio e no fim
+CORTES = [0, 0, 1, 700, 700, 1999, 2000, 2000]
+
+
+@pytest.mark.parametrize('via_json', [False, True])
+def test_mesclar_shards_igual_a_passagem_unica(ref, analises, via_json):
+    unica = _agregar(ref, analises, capacidade_frequentes=1000, limite_alta=50)
+    mesclada = _em_shards(ref, analises, CORTES, via_json, capacidade_frequentes=1000, limite_alta=50)
+    
+    assert mesclada.contagem == unica.contagem == len(analises)
+    assert mesclada.soma == pytest.approx(unica.soma, rel=1e-12)
+    assert mesclada.media == pytest.approx(unica.media, rel=1e-12)
+    assert mesclada.variancia == pytest.approx(unica.variancia, rel=1e-9)
+    assert (mesclada.minimo, mesclada.maximo) == (unica.minimo, unica.maximo)
+    assert mesclada.histograma == unica.histograma
+    # Sem redução (capacidade maior que o vocabulário) as contagens são exatas
+    assert mesclada.potencializadores == unica.potencializadores
+    assert mesclada.inibidores == unica.inibidores
+    
+    relatorio, esperado = mesclada.relatorio(), unica.relatorio()
+    assert relatorio['percentis_score'] == esperado['percentis_score']
+    assert relatorio['distribuicao_scores'] == esperado['distribuicao_scores']
+    assert relatorio['suplementos_alta_biodisponibilidade'] == esperado['suplementos_alta_biodisponibilidade']
+    assert relatorio['total_alta_biodisponibilidade'] == esperado['total_alta_biodisponibilidade']
+    assert relatorio['desvio_padrao_score'] == esperado['desvio_padrao_score']
+
+
+def test_variancia_mesclada_de_chan(ref, analises):
+    scores = [analise['score_biodisponibilidade'] for analise in analises]
+    mesclada = _em_shards(ref, analises, [0, 3, 1000, 1001, 2000])
+    
+    assert mesclada.media == pytest.approx(statistics.fmean(scores), rel=1e-12)
+    assert mesclada.variancia == pytest.approx(statistics.variance(scores), rel=1e-9)
+
+
+def test_variancia_com_um_elemento_por_shard(ref, analises):
+    scores = [analise['score_biodisponibilidade'] for analise in analises[:50]]
+    mesclada = _em_shards(ref, analises[:50], list(range(51)))
+    
+    assert mesclada.variancia == pytest.approx(statistics.variance(scores), rel=1e-9)
+
+
+@pytest.mark.parametrize('via_json', [False, True])
+def test_misra_gries_mesclado_respeita_limite_de_erro(ref, analises, via_json):
+    capacidade = 16
+    mesclada = _em_shards(ref, analises, CORTES, via_json, capacidade_frequentes=capacidade)
+    
+    for campo, contadores in (('potencializadores_recomendados', mesclada.potencializadores),
+                              ('inibidores_evitar', mesclada.inibidores)):
+        reais = Counter(item['nome'] for analise in analises for item in analise[campo])
+        erro = sum(reais.values()) / (capacidade + 1)
+        assert len(contadores) <= capacidade
+        for nome, real in reais.items():
+            # Subestima no máximo n/(k+1), nunca superestima; os muito frequentes sempre aparecem
+            estimada = contadores.get(nome, 0)
+            assert real - erro <= estimada <= real
+            if real > erro:
+                assert nome in contadores
+
+
+def test_percentis_nearest_rank(ref):
+    analises = [{'suplemento': str(i), 'score_biodisponibilidade': score,
+                 'potencializadores_recomendados': [], 'inibidores_evitar': []}
+                for i, score in enumerate([10, 20, 30, 40, 50, 60, 70, 80, 90, 100])]
+    mesclada = _em_shards(ref, analises, [0, 4, 4, 10], via_json=True)
+    
+    assert [mesclada.percentil(q) for q in (1, 10, 11, 50, 90, 91, 99, 100)] == [10, 10, 20, 50, 90, 100, 100, 100]
+    assert mesclada.relatorio()['percentis_score'] == {'p50': 50, 'p90': 90, 'p99': 100}
+
+
+def test_execucao_vazia(ref, analises):
+    vazio = ref.AgregadorEstatisticas()
+    restaurado = ref.AgregadorEstatisticas.de_estado(json.loads(json.dumps(vazio.para_estado())))
+    relatorio = restaurado.relatorio()
+    
+    assert restaurado.contagem == 0
+    assert restaurado.percentil(50) is None
+    assert relatorio['total_suplementos'] == 0
+    assert relatorio['score_medio'] == 0
+    assert relatorio['desvio_padrao_score'] == 0
+    assert relatorio['score_minimo'] is None and relatorio['score_maximo'] is None
+    assert relatorio['suplementos_alta_biodisponibilidade'] == []
+    assert relatorio == vazio.mesclar(restaurado).relatorio()
+    
+    # Vazio mesclado com não vazio (nos dois sentidos) não altera as estatísticas
+    parcial = _agregar(ref, analises[:100])
+    esperado = parcial.para_estado()
+    assert ref.AgregadorEstatisticas().mesclar(parcial).para_estado() == esperado
+    assert parcial.mesclar(ref.AgregadorEstatisticas()).para_estado() == esperado
@@ -0,0 +1,29 @@
+import pytest
+
+
+@pytest.fixture
+def analisador_com(ref, benchmarks):
+    def criar(armazenamento):
+        analisador = ref.AnalisadorBiodisponibilidade(verbose=False, carregamento_sob_demanda=True,
+                                                      armazenamento=armazenamento)
+        analisador.recarregar_bases_conhecimento(benchmarks.gerar_kb_sintetica(5, semente=1))
+        return analisador
+    return criar
+
+
+@pytest.mark.parametrize('tipo, segundo_plano', [('memoria', False), ('sqlite', False), ('sqlite', True)])
+def test_tabela_sem_caminho_exige_diretorio(ref, analisador_com, tmp_path, monkeypatch, tipo, segundo_plano):
+    monkeypatch.chdir(tmp_path)
+    destino = tmp_path / 'resultados.sqlite' if tipo == 'sqlite' else None
+    analisador = analisador_com(ref.criar_armazenamento(tipo, destino, segundo_plano))
+    
+    with pytest.raises(ValueError):
+        analisador.materializar_tabela()
+    assert [caminho.name for caminho in tmp_path.iterdir()] == []
+
+
+def test_tabela_sem_caminho_vai_para_o_diretorio_do_armazenamento(ref, analisador_com, tmp_path):
+    analisador = analisador_com(ref.ArmazenamentoDiretorio(tmp_path / 'saida'))
+    tabela = analisador.materializar_tabela()
+    assert tabela.caminho == tmp_path / 'saida' / 'tabela_materializada.json.gz'
+
@@ -0,0 +1,91 @@
+import copy
+
+import pytest
+
+PERFIS = [None, {'idade': 70}, {'idade': 25, 'condicoes_gastro': ['acidez_baixa']},
+          {'idade': 30, 'estilo_vida': ['atleta']}]
+
+
+def _sem_timestamp(analise):
+    return {campo: valor for campo, valor in analise.items() if campo != 'timestamp'}
+
+
+@pytest.fixture(scope='module')
+def bases(benchmarks):
+    return benchmarks.gerar_kb_sintetica(12, semente=4)
+
+
+def _analisador(ref, bases, tamanho_cache=1024):
+    analisador = ref.AnalisadorBiodisponibilidade(verbose=False, carregamento_sob_demanda=True,
+                                                  tamanho_cache=tamanho_cache)
+    analisador.recarregar_bases_conhecimento(bases)
+    return analisador
+
+
+def test_despejo_lru_e_contadores(ref):
+    cache = ref.CacheLRU(2)
+    calculos = []
+    calcular = lambda chave: lambda: calculos.append(chave) or chave.upper()
+    
+    assert cache.obter('a', calcular('a')) == 'A'
+    assert cache.obter('b', calcular('b')) == 'B'
+    assert cache.obter('a', calcular('a')) == 'A'  # 'a' passa a ser a mais recente
+    assert cache.obter('c', calcular('c')) == 'C'  # despeja 'b'
+    assert cache.obter('a', calcular('a')) == 'A'
+    assert cache.obter('b', calcular('b')) == 'B'
+    
+    assert calculos == ['a', 'b', 'c', 'b']
+    assert cache.estatisticas() == {'entradas': 2, 'tamanho_maximo': 2, 'acertos': 2, 'falhas': 4,
+                                    'despejos': 2, 'taxa_acerto': 0.3333}
+
+
+def test_tamanho_zero_desativa(ref):
+    cache = ref.CacheLRU(0)
+    calculos = []
+    for _ in range(3):
+        assert cache.obter('a', lambda: calculos.append('a') or 1) == 1
+    assert calculos == ['a'] * 3
+    assert cache.estatisticas()['entradas'] == 0
+
+
+def test_memoizado_igual_ao_sem_cache(ref, bases):
+    com_cache = _analisador(ref, bases)
+    sem_cache = _analisador(ref, bases, tamanho_cache=0)
+    nomes = list(bases['formas_farmaceuticas'])
+    
+    for _ in range(2):
+        for nome in nomes:
+            for perfil in PERFIS:
+                memoizada = com_cache.analisar_biodisponibilidade_suplemento(nome, perfil_usuario=perfil)
+                calculada = sem_cache.analisar_biodisponibilidade_suplemento(nome, perfil_usuario=perfil)
+                assert _sem_timestamp(memoizada) == _sem_timestamp(calculada)
+    
+    estatisticas = com_cache.estatisticas_cache()
+    assert estatisticas['base']['falhas'] == len(nomes)
+    assert estatisticas['base']['acertos'] == len(nomes) * (2 * len(PERFIS) - 1)
+    assert sem_cache.estatisticas_cache()['base']['entradas'] == 0
+
+
+def test_recarregar_bases_invalida_os_caches(ref, bases):
+    analisador = _analisador(ref, bases)
+    nome = sorted(bases['formas_farmaceuticas'])[3]
+    antes = analisador.analisar_biodisponibilidade_suplemento(nome, perfil_usuario={'idade': 70})
+    analisador.analisar_biodisponibilidade_suplemento(nome, perfil_usuario={'idade': 70})
+    assert analisador.estatisticas_cache()['base']['acertos'] == 1
+    
+    editada = copy.deepcopy(bases)
+    for forma in editada['formas_farmaceuticas'][nome]['formas_disponiveis'].values():
+        forma['biodisponibilidade'] = round(forma['biodisponibilidade'] * 3, 2)
+    analisador.recarregar_bases_conhecimento(editada)
+    
+    estatisticas = analisador.estatisticas_cache()
+    assert estatisticas['base']['entradas'] == 0
+    assert estatisticas['personalizacao']['entradas'] == 0
+    
+    depois = analisador.analisar_biodisponibilidade_suplemento(nome, perfil_usuario={'idade': 70})
+    esperada = _analisador(ref, editada, tamanho_cache=0).analisar_biodisponibilidade_suplemento(
+        nome, perfil_usuario={'idade': 70}
+    )
+    assert _sem_timestamp(depois) == _sem_timestamp(esperada)
+    assert depois['analise_formas_farmaceuticas'] != antes['analise_formas_farmaceuticas']
+    assert analisador.estatisticas_cache()['base']['falhas'] == 2
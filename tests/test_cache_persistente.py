@@ -0,0 +1,33 @@
+import sqlite3
+import time
+
+
+def test_estatisticas_nao_abrem_transacao_de_escrita(ref, tmp_path):
+    cache = ref.CachePersistente(tmp_path / 'cache.sqlite', timeout_s=0.2)
+    cache.armazenar('a', {'valor': 1})
+    assert cache.obter('a') == {'valor': 1}
+    assert cache.obter('b') is None
+    
+    # Outro processo segurando o bloqueio de escrita não impede a leitura das estatísticas
+    escritor = sqlite3.connect(tmp_path / 'cache.sqlite', isolation_level=None)
+    escritor.execute('BEGIN IMMEDIATE')
+    try:
+        estatisticas = cache.estatisticas()
+    finally:
+        escritor.execute('ROLLBACK')
+        escritor.close()
+        cache.fechar()
+    
+    assert (estatisticas['entradas'], estatisticas['acertos'], estatisticas['falhas']) == (1, 1, 1)
+
+
+def test_entrada_expirada_e_apagada_na_leitura(ref, tmp_path):
+    cache = ref.CachePersistente(tmp_path / 'cache.sqlite', idade_maxima_s=0.01)
+    cache.armazenar('a', {'valor': 1})
+    time.sleep(0.05)
+    
+    assert cache.obter('a') is None
+    estatisticas = cache.estatisticas()
+    cache.fechar()
+    assert (estatisticas['entradas'], estatisticas['bytes_valores']) == (0, 0)
+    assert (estatisticas['expirados'], estatisticas['falhas']) == (1, 1)
@@ -0,0 +1,116 @@
+import pytest
+
+STACK = ['Iron', 'Zinc', 'Calcium', 'Magnesium', 'Vitamin D', 'Vitamin C', 'Curcumin', 'Melatonin', 'Vitamin B12']
+
+
+def _minutos(horario):
+    horas, minutos = horario.split(':')
+    return int(horas) * 60 + int(minutos)
+
+
+def _analisador(ref, timing=None):
+    """Bases embutidas; `timing` substitui a base de timing circadiano (janelas controladas)"""
+    analisador = ref.AnalisadorBiodisponibilidade(verbose=False, carregamento_sob_demanda=True)
+    if timing is not None:
+        analisador.recarregar_bases_conhecimento({'timing_circadiano': timing})
+    return analisador
+
+
+def _restricoes(cronograma, tipo):
+    return {item['suplemento'] for item in cronograma['restricoes_nao_atendidas'] if item['restricao'] == tipo}
+
+
+def _separacoes_violadas(analisador, stack, cronograma, padrao=120):
+    """Pares em conflito dosados mais perto que a separação mínima (a da base ou `padrao`)"""
+    alocacao = {suplemento: _minutos(horario) for suplemento, horario in cronograma['alocacao'].items()}
+    minimos = {}
+    for conflito in analisador.analisar_interacoes_stack(stack)['conflitos']:
+        par = frozenset((conflito['a'], conflito['b']))
+        minimos[par] = max(minimos.get(par, 0), conflito['separacao_minutos'] or padrao)
+    return {par for par, minimo in minimos.items() if abs(alocacao[min(par)] - alocacao[max(par)]) < minimo}
+
+
+def test_cronograma_das_bases_embutidas(ref):
+    analisador = _analisador(ref)
+    cronograma = analisador.otimizar_cronograma_diario(STACK + ['ferro'])
+    alocacao = cronograma['alocacao']
+    
+    # Cada suplemento (aliases deduplicados) aparece exatamente uma vez, dentro do dia
+    assert sorted(alocacao) == sorted(STACK)
+    assert sorted(s for horario in cronograma['horarios'] for s in horario['suplementos']) == sorted(STACK)
+    assert all(_minutos('06:00') <= _minutos(horario) <= _minutos('23:00') for horario in alocacao.values())
+    assert cronograma['total_horarios'] == len(cronograma['horarios']) == len(set(alocacao.values()))
+    # Separações não atendidas só podem faltar se relatadas
+    for par in _separacoes_violadas(analisador, STACK, cronograma):
+        assert par & _restricoes(cronograma, 'separacao')
+
+
+def test_separacoes_atendidas_quando_possivel(ref):
+    analisador = _analisador(ref, timing={})
+    stack = ['Iron', 'Zinc', 'Calcium', 'Magnesium']
+    cronograma = analisador.otimizar_cronograma_diario(stack, separacao_padrao_minutos=180)
+    
+    assert cronograma['restricoes_nao_atendidas'] == []
+    assert not _separacoes_violadas(analisador, stack, cronograma, padrao=180)
+    # Ferro, zinco e cálcio conflitam dois a dois: ao menos três horários
+    assert cronograma['total_horarios'] >= 3
+
+
+def test_sem_restricoes_consolida_num_horario(ref):
+    analisador = _analisador(ref, timing={})
+    cronograma = analisador.otimizar_cronograma_diario(['Curcumin', 'Vitamin D', 'Omega-3', 'CoQ10'])
+    
+    assert cronograma['total_horarios'] == 1
+    assert cronograma['restricoes_nao_atendidas'] == []
+
+
+def test_janela_jejum_e_refeicao_atendidas(ref):
+    analisador = _analisador(ref, timing={
+        'Iron': {'timing_otimo': 'Manhã em jejum', 'horario_ideal': '06:30-08:00',
+                 'fatores_timing': {'refeicoes': 'Tomar com estômago vazio'}},
+        'Vitamin D': {'timing_otimo': 'Com almoço', 'horario_ideal': 'Com almoço',
+                      'fatores_timing': {'refeicoes': 'Tomar com refeição'}},
+        'Melatonin': {'timing_otimo': 'Noite', 'horario_ideal': '21:00-22:00'},
+    })
+    cronograma = analisador.otimizar_cronograma_diario(['Iron', 'Vitamin D', 'Melatonin'])
+    alocacao = {suplemento: _minutos(horario) for suplemento, horario in cronograma['alocacao'].items()}
+    
+    assert cronograma['restricoes_nao_atendidas'] == []
+    assert _minutos('06:30') <= alocacao['Iron'] <= _minutos('08:00')
+    # Jejum: ao menos 30 min antes do café da manhã padrão (08:00)
+    assert alocacao['Iron'] <= _minutos('08:00') - 30
+    assert cronograma['alocacao']['Vitamin D'] == '12:30'
+    assert _minutos('21:00') <= alocacao['Melatonin'] <= _minutos('22:00')
+    refeicoes = {horario['horario']: horario['refeicao'] for horario in cronograma['horarios']}
+    assert refeicoes['12:30'] == 'almoco'
+
+
+@pytest.mark.parametrize('timing, restricao', [
+    # Janela fora do período do dia
+    ({'Magnesium': {'timing_otimo': 'Madrugada', 'horario_ideal': '02:00-03:00'}}, 'janela'),
+    # Exige refeição numa janela sem refeição
+    ({'Magnesium': {'timing_otimo': 'Tarde', 'horario_ideal': '15:00-16:00',
+                    'fatores_timing': {'refeicoes': 'Tomar com refeição'}}}, 'refeicao'),
+    # Jejum numa janela que começa no almoço
+    ({'Magnesium': {'timing_otimo': 'Almoço', 'horario_ideal': '12:30-13:30',
+                    'fatores_timing': {'refeicoes': 'Tomar em jejum'}}}, 'refeicao'),
+])
+def test_restricao_impossivel_relatada(ref, timing, restricao):
+    analisador = _analisador(ref, timing=timing)
+    cronograma = analisador.otimizar_cronograma_diario(['Magnesium', 'Vitamin D'])
+    
+    assert _restricoes(cronograma, restricao) == {'Magnesium'}
+    # O suplemento continua no cronograma, dentro do período do dia
+    assert _minutos('06:00') <= _minutos(cronograma['alocacao']['Magnesium']) <= _minutos('23:00')
+
+
+def test_separacao_impossivel_relatada(ref):
+    # Ferro e zinco presos à mesma janela curta, com 2h de separação mínima entre eles
+    janela = {'timing_otimo': 'Manhã', 'horario_ideal': '07:00-07:30'}
+    analisador = _analisador(ref, timing={'Iron': janela, 'Zinc': janela})
+    cronograma = analisador.otimizar_cronograma_diario(['Iron', 'Zinc'])
+    
+    violadas = _separacoes_violadas(analisador, ['Iron', 'Zinc'], cronograma)
+    assert violadas == {frozenset(('Iron', 'Zinc'))}
+    relatadas = [item for item in cronograma['restricoes_nao_atendidas'] if item['restricao'] == 'separacao']
+    assert relatadas and all('min abaixo do mínimo' in item['detalhe'] for item in relatadas)
@@ -0,0 +1,102 @@
+import itertools
+import math
+
+import numpy as np
+import pandas as pd
+import pytest
+
+
+@pytest.fixture(scope='module')
+def analisador(ref):
+    return ref.AnalisadorBiodisponibilidade(verbose=False, carregamento_sob_demanda=True)
+
+
+@pytest.fixture(scope='module')
+def sintetico(ref, benchmarks):
+    analisador = ref.AnalisadorBiodisponibilidade(verbose=False, carregamento_sob_demanda=True)
+    analisador.recarregar_bases_conhecimento(benchmarks.gerar_kb_sintetica(40, semente=12))
+    return analisador
+
+
+def _linhas(analisador):
+    """Todo par (origem, destino) de cada suplemento, mais aliases, grafias livres e nomes desconhecidos"""
+    linhas = []
+    for suplemento, dados in analisador.formas_farmaceuticas.items():
+        formas = list(dados['formas_disponiveis']) + ['forma_inexistente']
+        linhas += [(suplemento, origem, destino) for origem, destino in itertools.product(formas, formas + [None])]
+    linhas += [
+        ('magnesio', 'citrato_magnesio', None),
+        ('Magnesium', 'Citrato Magnesio', 'GLICINATO_MAGNESIO'),
+        ('ferro', 'bisglicinato_ferro', 'sulfato_ferroso'),
+        ('Suplemento Inexistente', 'qualquer', None),
+    ]
+    return linhas
+
+
+def _iguais(obtidos, esperados):
+    obtidos, esperados = np.asarray(obtidos), np.asarray(esperados)
+    return bool(np.all((obtidos == esperados) | (np.isnan(obtidos) & np.isnan(esperados))))
+
+
+@pytest.mark.parametrize('base', ['analisador', 'sintetico'])
+def test_paridade_linha_a_linha(request, base):
+    analisador = request.getfixturevalue(base)
+    linhas = _linhas(analisador)
+    doses = [5.0, 25.0, 100.0, 400.0, 1000.0] * (len(linhas) // 5 + 1)
+    suplementos, origens, destinos = (list(coluna) for coluna in zip(*linhas))
+    
+    vetorizado = analisador.converter_dose(suplementos, origens, doses[:len(linhas)], destinos)
+    escalar = [analisador.converter_dose(*linha[:2], dose, linha[2]) for linha, dose in zip(linhas, doses)]
+    
+    assert vetorizado.dtype == np.float64 and vetorizado.shape == (len(linhas),)
+    for linha, esperado, obtido in zip(linhas, escalar, vetorizado):
+        assert _iguais(obtido, esperado), linha
+    assert np.isnan(vetorizado).any() and not np.isnan(vetorizado).all()
+
+
+def test_conversao_escalar_pela_biodisponibilidade(analisador):
+    formas = analisador.formas_farmaceuticas['Magnesium']['formas_disponiveis']
+    
+    assert analisador.converter_dose('Magnesium', 'citrato_magnesio', 400, 'glicinato_magnesio') == (
+        400 * formas['citrato_magnesio']['biodisponibilidade'] / formas['glicinato_magnesio']['biodisponibilidade']
+    )
+    # Destino None: forma padrão
+    assert analisador.forma_padrao('magnesio') == 'oxido_magnesio'
+    assert analisador.converter_dose('Magnesium', 'glicinato_magnesio', 100) == (
+        analisador.converter_dose('Magnesium', 'glicinato_magnesio', 100, 'oxido_magnesio')
+    )
+    assert analisador.forma_padrao('Curcumin') == 'curcumina_padrao'
+    assert math.isnan(analisador.converter_dose('Magnesium', 'forma_inexistente', 100))
+    assert math.isnan(analisador.converter_dose('Suplemento Inexistente', 'qualquer', 100))
+    assert analisador.forma_padrao('Suplemento Inexistente') is None
+
+
+def test_ranking_formas_decrescente(analisador):
+    for suplemento, dados in analisador.formas_farmaceuticas.items():
+        ranking = analisador.ranking_formas(suplemento)
+        assert sorted(ranking) == sorted(
+            (nome, forma['biodisponibilidade']) for nome, forma in dados['formas_disponiveis'].items()
+        )
+        assert [bio for _, bio in ranking] == sorted((bio for _, bio in ranking), reverse=True)
+    assert analisador.ranking_formas('Suplemento Inexistente') == ()
+
+
+def test_escalares_repetidos_e_colunas_dataframe(analisador):
+    formas = list(analisador.formas_farmaceuticas['Iron']['formas_disponiveis'])
+    quadro = pd.DataFrame({'forma': formas, 'dose': np.linspace(10, 100, len(formas))})
+    
+    vetorizado = analisador.converter_dose('ferro', quadro['forma'], quadro['dose'], 'bisglicinato_ferro')
+    escalar = [analisador.converter_dose('ferro', forma, dose, 'bisglicinato_ferro')
+               for forma, dose in zip(quadro['forma'], quadro['dose'])]
+    assert _iguais(vetorizado, escalar)
+    
+    # Dose escalar repetida para todas as linhas
+    repetida = analisador.converter_dose(['Iron', 'Zinc'], ['ferro_lipossomal', 'zinco_lipossomal'], 50.0)
+    assert repetida.tolist() == [analisador.converter_dose('Iron', 'ferro_lipossomal', 50.0),
+                                 analisador.converter_dose('Zinc', 'zinco_lipossomal', 50.0)]
+
+
+def test_colunas_vazias_e_tamanhos_diferentes(analisador):
+    assert analisador.converter_dose([], [], []).shape == (0,)
+    with pytest.raises(ValueError):
+        analisador.converter_dose(['Iron', 'Zinc'], ['ferro_lipossomal'], [10.0, 20.0])
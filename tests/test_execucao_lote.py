@@ -0,0 +1,38 @@
+import pytest
+
+
+@pytest.fixture(scope='module')
+def analisador_sintetico(ref, benchmarks):
+    analisador = ref.AnalisadorBiodisponibilidade(verbose=False, carregamento_sob_demanda=True)
+    analisador.recarregar_bases_conhecimento(benchmarks.gerar_kb_sintetica(20, semente=7))
+    return analisador
+
+
+def _pares(analisador):
+    perfis = [None, {'idade': 70, 'condicoes_gastro': ['acloridria']}, {'idade': 30, 'estilo_vida': ['ativo']}]
+    return [(suplemento, perfil) for suplemento in list(analisador.formas_farmaceuticas)[:8] for perfil in perfis]
+
+
+def _comparavel(resultados):
+    return [{chave: valor for chave, valor in analise.items() if chave != 'timestamp'} for analise in resultados]
+
+
+def test_modo_processo_usa_bases_substituidas(analisador_sintetico):
+    pares = _pares(analisador_sintetico)
+    sequencial = analisador_sintetico.executar_analise_lote(pares, workers=1)
+    threads = analisador_sintetico.executar_analise_lote(pares, workers=2, modo='thread', tamanho_bloco=4)
+    processos = analisador_sintetico.executar_analise_lote(pares, workers=2, modo='processo', tamanho_bloco=4)
+    
+    assert _comparavel(threads) == _comparavel(sequencial)
+    assert _comparavel(processos) == _comparavel(sequencial)
+
+
+def test_modo_processo_usa_base_atribuida(ref, benchmarks):
+    analisador = ref.AnalisadorBiodisponibilidade(verbose=False, carregamento_sob_demanda=True)
+    sintetica = benchmarks.gerar_kb_sintetica(20, semente=11)
+    analisador.formas_farmaceuticas = sintetica['formas_farmaceuticas']
+    pares = [(suplemento, None) for suplemento in list(sintetica['formas_farmaceuticas'])[:6]]
+    
+    sequencial = analisador.executar_analise_lote(pares, workers=1)
+    processos = analisador.executar_analise_lote(pares, workers=2, modo='processo', tamanho_bloco=2)
+    assert _comparavel(processos) == _comparavel(sequencial)
@@ -0,0 +1,74 @@
+import csv
+import gzip
+import json
+import math
+
+import pytest
+
+
+@pytest.fixture(scope='module')
+def tabela(ref, benchmarks, tmp_path_factory):
+    analisador = ref.AnalisadorBiodisponibilidade(verbose=False, carregamento_sob_demanda=True)
+    analisador.recarregar_bases_conhecimento(benchmarks.gerar_kb_sintetica(4, semente=5))
+    return analisador.materializar_tabela(tmp_path_factory.mktemp('tabela') / 'tabela.json.gz')
+
+
+@pytest.mark.parametrize('valor, literal', [
+    (math.nan, "'NaN'::float8"), (math.inf, "'Infinity'::float8"), (-math.inf, "'-Infinity'::float8"),
+    (1.5, '1.5'), (3, '3'), (None, 'NULL'), ("d'água", "'d''água'"),
+])
+def test_literal_sql(ref, valor, literal):
+    assert ref._literal_sql(valor) == literal
+
+
+def test_buckets_decompostos(ref, tabela):
+    bits = tabela.layout_perfil()['bits_perfil']
+    for _, bucket, faixa, mascara, _, _ in ref.linhas_supabase(tabela)['bioavailability_profile_scores']:
+        assert (faixa << bits | mascara) == bucket
+        assert mascara < 1 << bits
+
+
+def test_ids_do_app_ligados_por_join(ref, tabela, tmp_path):
+    canonico = tabela.suplementos()[0]
+    manifesto = ref.exportar_supabase(tabela, tmp_path, ids_app={canonico: "id'app", 'Inexistente': 'x'})
+    
+    assert manifesto['ids_app'] == {canonico: "id'app"}
+    for script in ('carregar_copy.sql', 'carregar_insert.sql'):
+        texto = (tmp_path / script).read_text(encoding='utf-8')
+        assert f"('{canonico}', 'id''app')" in texto
+        assert 'JOIN public.supplements AS s ON s.id = m.app_supplement_id' in texto
+        assert texto.index('UPDATE public.bioavailability_analyses') < texto.index('COMMIT;')
+
+
+def test_scores_nao_finitos_no_csv(ref, tabela, tmp_path):
+    # Tabela com scores NaN para um suplemento (o JSON do arquivo aceita NaN)
+    dados = json.loads(gzip.decompress(tabela.caminho.read_bytes()))
+    canonico = tabela.suplementos()[0]
+    dados['scores'][canonico] = [math.nan] * len(dados['scores'][canonico])
+    alterada = ref.TabelaMaterializada(dados, tmp_path / 'alterada.json.gz')
+    ref.exportar_supabase(alterada, tmp_path, formatos=('csv', 'sql'), ids_app={})
+    
+    with open(tmp_path / 'bioavailability_analyses.csv', encoding='utf-8') as f:
+        linhas = {linha['supplement_id']: linha for linha in csv.DictReader(f)}
+    assert linhas[canonico]['bioavailability_score'] == 'NaN'
+    texto = (tmp_path / 'carregar_insert.sql').read_text(encoding='utf-8')
+    assert "'NaN'::float8" in texto
+
+
+def test_manifesto_e_linhas_pelos_acessores(ref, tabela, tmp_path):
+    manifesto = ref.exportar_supabase(tabela, tmp_path, formatos=('csv',), ids_app={})
+    linhas = ref.linhas_supabase(tabela)
+    
+    assert manifesto['layout_perfil'] == tabela.layout_perfil()
+    assert json.loads((tmp_path / 'manifesto.json').read_text(encoding='utf-8'))['layout_perfil'] == (
+        tabela.layout_perfil()
+    )
+    assert [linha[0] for linha in linhas['bioavailability_analyses']] == list(tabela.suplementos())
+    assert len(linhas['bioavailability_personalizations']) == len(tabela.personalizacoes())
+    assert len(linhas['bioavailability_profile_scores']) == len(tabela) == (
+        len(tabela.suplementos()) * len(tabela.indices_personalizacao())
+    )
+    for canonico, base, scores in tabela.iter_linhas():
+        analise = tabela.analise(canonico)
+        assert analise['score_biodisponibilidade'] == scores[0]
+        assert {campo: analise[campo] for campo in base} == base
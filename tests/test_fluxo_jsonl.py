@@ -0,0 +1,109 @@
+import gzip
+import itertools
+import json
+import subprocess
+import sys
+
+import pytest
+
+ENTRADAS = [
+    'magnesio',
+    {'suplemento': 'Curcumin', 'perfil_usuario': {'idade': 70}},
+    {'suplemento': 'ferro', 'perfil_usuario': {'idade': 30, 'condicoes_gastro': ['acidez_baixa']},
+     'condicao_saude': 'anemia'},
+    'Vitamin D',
+]
+
+
+def _sem_timestamp(analise):
+    return {campo: valor for campo, valor in analise.items() if campo != 'timestamp'}
+
+
+@pytest.fixture(scope='module')
+def analisador(ref):
+    return ref.AnalisadorBiodisponibilidade(verbose=False, carregamento_sob_demanda=True)
+
+
+def _esperadas(analisador, entradas):
+    return [
+        _sem_timestamp(analisador.analisar_biodisponibilidade_suplemento(entrada)) if isinstance(entrada, str)
+        else _sem_timestamp(analisador.analisar_biodisponibilidade_suplemento(
+            entrada['suplemento'], entrada.get('condicao_saude'), entrada.get('perfil_usuario')
+        ))
+        for entrada in entradas
+    ]
+
+
+@pytest.mark.parametrize('nome', ['entradas.jsonl', 'entradas.jsonl.gz'])
+def test_ler_entradas(ref, tmp_path, nome):
+    caminho = tmp_path / nome
+    linhas = ['magnesio', '', json.dumps(ENTRADAS[1]), '   ', json.dumps(ENTRADAS[2], ensure_ascii=False), 'Vitamin D']
+    conteudo = '\n'.join(linhas).encode('utf-8')
+    caminho.write_bytes(gzip.compress(conteudo) if nome.endswith('.gz') else conteudo)
+    
+    assert list(ref.ler_entradas_jsonl(caminho)) == ENTRADAS
+
+
+@pytest.mark.parametrize('nome', ['saida.jsonl', 'saida.jsonl.gz'])
+def test_escrever_e_acrescentar(ref, tmp_path, nome):
+    caminho = tmp_path / nome
+    registros = [{'suplemento': 'magnésio', 'score': i} for i in range(5)]
+    
+    assert ref.escrever_jsonl(iter(registros[:3]), caminho, intervalo_flush=2) == 3
+    # Acrescentar ao mesmo destino (no gzip, um novo membro)
+    assert ref.escrever_jsonl(iter(registros[3:]), caminho) == 2
+    
+    conteudo = caminho.read_bytes()
+    if nome.endswith('.gz'):
+        conteudo = gzip.decompress(conteudo)
+    linhas = conteudo.decode('utf-8').splitlines()
+    assert [json.loads(linha) for linha in linhas] == registros
+    assert linhas[0] == '{"suplemento":"magnésio","score":0}'
+
+
+def test_escrever_indentado_e_comprimido_sem_extensao(ref, tmp_path):
+    caminho = tmp_path / 'saida.bin'
+    ref.escrever_jsonl([{'a': 1, 'b': [1, 2]}], caminho, comprimir=True, compacto=False)
+    
+    assert gzip.decompress(caminho.read_bytes()) == b'{"a": 1, "b": [1, 2]}\n'
+
+
+@pytest.mark.parametrize('workers, modo', [(1, 'processo'), (2, 'thread'), (2, 'processo')])
+def test_fluxo_igual_a_analise_individual(analisador, workers, modo):
+    entradas = ENTRADAS * 20
+    resultados = analisador.analisar_em_fluxo(iter(entradas), workers=workers, modo=modo, tamanho_bloco=3)
+    
+    assert [_sem_timestamp(resultado) for resultado in resultados] == _esperadas(analisador, entradas)
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_fluxo_consome_entradas_sob_demanda(analisador, workers):
+    consumidas = []
+    
+    def entradas():
+        for i in itertools.count():
+            consumidas.append(i)
+            yield 'magnesio'
+    
+    resultados = analisador.analisar_em_fluxo(entradas(), workers=workers, modo='thread', tamanho_bloco=4)
+    primeiros = list(itertools.islice(resultados, 10))
+    resultados.close()
+    
+    assert len(primeiros) == 10
+    # Entrada infinita: só a janela de blocos pendentes (2 por worker) é lida adiante
+    assert len(consumidas) <= 10 + 4 * 2 * workers + 1
+
+
+def test_comando_fluxo_stdin_stdout(ref, analisador, tmp_path):
+    entrada = '\n'.join(json.dumps(entrada) if isinstance(entrada, dict) else entrada for entrada in ENTRADAS)
+    processo = subprocess.run(
+        [sys.executable, ref.__file__, 'fluxo', '--workers', '1'],
+        input=entrada, capture_output=True, text=True, timeout=120, check=True
+    )
+    # Esperado: as mesmas análises serializadas pelo próprio escrever_jsonl
+    esperado = tmp_path / 'esperado.jsonl'
+    ref.escrever_jsonl(_esperadas(analisador, ENTRADAS), esperado)
+    
+    resultados = [_sem_timestamp(json.loads(linha)) for linha in processo.stdout.splitlines()]
+    assert resultados == [json.loads(linha) for linha in esperado.read_text(encoding='utf-8').splitlines()]
+    assert f'{len(ENTRADAS)} análises escritas' in processo.stderr
@@ -0,0 +1,105 @@
+import copy
+import sqlite3
+
+import pytest
+
+PERFIS = [None, {'idade': 70}, {'idade': 30, 'condicoes_gastro': ['acidez_baixa'], 'estilo_vida': ['atleta']}]
+
+
+def _sem_timestamp(analise):
+    return {campo: valor for campo, valor in analise.items() if campo != 'timestamp'}
+
+
+@pytest.fixture(scope='module')
+def embutido(ref):
+    return ref.AnalisadorBiodisponibilidade(verbose=False)
+
+
+@pytest.fixture(scope='module')
+def arquivo_kb(embutido, tmp_path_factory):
+    caminho = tmp_path_factory.mktemp('kb') / 'bases.sqlite'
+    embutido.exportar_bases_conhecimento(caminho, versao='2026.1')
+    return caminho
+
+
+def test_bases_do_arquivo_iguais_as_embutidas(ref, embutido, arquivo_kb):
+    analisador = ref.AnalisadorBiodisponibilidade(verbose=False, fonte_kb=arquivo_kb)
+    
+    for nome in ref.AnalisadorBiodisponibilidade.BASES_CONHECIMENTO:
+        base = getattr(analisador, nome)
+        assert isinstance(base, ref.BaseConhecimentoArquivo)
+        # Mesmas entradas, na mesma ordem
+        assert list(base.items()) == list(getattr(embutido, nome).items())
+
+
+def test_analises_iguais_as_das_bases_embutidas(ref, embutido, arquivo_kb):
+    analisador = ref.AnalisadorBiodisponibilidade(verbose=False, carregamento_sob_demanda=True, fonte_kb=arquivo_kb)
+    
+    for suplemento in ref.SUPLEMENTOS_PRIORITARIOS:
+        for perfil in PERFIS:
+            do_arquivo = analisador.analisar_biodisponibilidade_suplemento(suplemento, perfil_usuario=perfil)
+            esperada = embutido.analisar_biodisponibilidade_suplemento(suplemento, perfil_usuario=perfil)
+            assert _sem_timestamp(do_arquivo) == _sem_timestamp(esperada)
+
+
+def test_versao_e_hash(ref, embutido, arquivo_kb):
+    analisador = ref.AnalisadorBiodisponibilidade(verbose=False, carregamento_sob_demanda=True, fonte_kb=arquivo_kb)
+    versao = analisador.versao_kb_ativa()
+    
+    assert versao['fonte'] == str(arquivo_kb)
+    assert versao['versao'] == '2026.1'
+    assert versao['hash_conteudo'] == embutido.hash_kb()
+    assert versao['bases_substituidas'] == []
+    assert embutido.versao_kb_ativa()['versao'] == ref.VERSAO_KB_EMBUTIDA
+    assert ref.FonteKBArquivo(arquivo_kb).verificar_integridade()
+
+
+def test_integridade_detecta_arquivo_alterado(ref, arquivo_kb, tmp_path):
+    alterado = tmp_path / 'alterado.sqlite'
+    alterado.write_bytes(arquivo_kb.read_bytes())
+    conexao = sqlite3.connect(alterado)
+    conexao.execute("UPDATE entradas SET valor = '{}' WHERE ordem = 0 AND base = 'formas_farmaceuticas'")
+    conexao.commit()
+    conexao.close()
+    
+    assert not ref.FonteKBArquivo(alterado).verificar_integridade()
+
+
+def test_nova_versao_lida_ao_recarregar(ref, benchmarks, tmp_path):
+    caminho = tmp_path / 'bases.sqlite'
+    bases = benchmarks.gerar_kb_sintetica(8, semente=2)
+    ref.exportar_bases_conhecimento(bases, caminho, versao='1')
+    analisador = ref.AnalisadorBiodisponibilidade(verbose=False, fonte_kb=caminho)
+    nome = sorted(bases['formas_farmaceuticas'])[0]
+    hash_v1 = analisador.hash_kb()
+    
+    editada = copy.deepcopy(bases)
+    for forma in editada['formas_farmaceuticas'][nome]['formas_disponiveis'].values():
+        forma['biodisponibilidade'] = round(forma['biodisponibilidade'] * 2, 2)
+    # Substituição atômica do arquivo enquanto o analisador o mantém aberto
+    ref.exportar_bases_conhecimento(editada, caminho, versao='2')
+    assert analisador.versao_kb_ativa()['versao'] == '1'
+    
+    analisador.recarregar_bases_conhecimento()
+    versao = analisador.versao_kb_ativa()
+    assert versao['versao'] == '2'
+    assert versao['hash_conteudo'] == ref.hash_bases_conhecimento(editada) != hash_v1
+    
+    esperado = ref.AnalisadorBiodisponibilidade(verbose=False)
+    esperado.recarregar_bases_conhecimento(editada)
+    assert (_sem_timestamp(analisador.analisar_biodisponibilidade_suplemento(nome))
+            == _sem_timestamp(esperado.analisar_biodisponibilidade_suplemento(nome)))
+
+
+def test_arquivo_ausente_ou_de_outro_formato(ref, arquivo_kb, tmp_path):
+    with pytest.raises(FileNotFoundError):
+        ref.FonteKBArquivo(tmp_path / 'inexistente.sqlite').metadados
+    
+    outro_formato = tmp_path / 'outro.sqlite'
+    outro_formato.write_bytes(arquivo_kb.read_bytes())
+    conexao = sqlite3.connect(outro_formato)
+    conexao.execute("UPDATE metadados SET valor = '99' WHERE chave = 'formato'")
+    conexao.commit()
+    conexao.close()
+    with pytest.raises(ValueError):
+        ref.FonteKBArquivo(outro_formato).base('formas_farmaceuticas')
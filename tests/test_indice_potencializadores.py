@@ -0,0 +1,62 @@
+import pytest
+
+# Nomes esperados, na ordem das bases (universais, específicos; competição, quelantes)
+ESPERADOS = {
+    'Curcumin': (['piperina', 'quercetina', 'lecitina'], []),
+    'Iron': (['vitamina_c_para_ferro'], ['ferro_vs_zinco', 'ferro_vs_calcio', 'fitatos', 'oxalatos', 'taninos']),
+    # 'D' em ['Vitamina A', 'D', 'E', 'K'] herda o prefixo 'Vitamina'
+    'Vitamin D': (['lecitina', 'gordura_para_liposoluveis'], []),
+    'Calcium': (['vitamina_d_para_calcio'], ['ferro_vs_calcio', 'calcio_vs_magnesio', 'fitatos', 'oxalatos']),
+    'Zinc': ([], ['ferro_vs_zinco', 'fitatos', 'taninos']),
+    'Magnesium': ([], ['calcio_vs_magnesio', 'fitatos']),
+}
+
+
+@pytest.fixture(scope='module')
+def analisador(ref):
+    return ref.AnalisadorBiodisponibilidade(verbose=False, carregamento_sob_demanda=True)
+
+
+def _nomes(analisador, suplemento):
+    return (
+        [item['nome'] for item in analisador.identificar_potencializadores(suplemento)],
+        [item.get('interacao') or item['nome'] for item in analisador.identificar_inibidores(suplemento)],
+    )
+
+
+@pytest.mark.parametrize('suplemento', ESPERADOS)
+def test_listas_em_portugues_casam_com_ids_em_ingles(analisador, suplemento):
+    assert _nomes(analisador, suplemento) == ESPERADOS[suplemento]
+
+
+@pytest.mark.parametrize('alias, canonico', [
+    ('Curcumina', 'Curcumin'), ('ferro', 'Iron'), ('FERRO', 'Iron'), ('cálcio', 'Calcium'), ('calcio', 'Calcium'),
+    ('Vitamina D', 'Vitamin D'), ('magnésio', 'Magnesium'),
+])
+def test_aliases_resolvem_para_o_mesmo_resultado(analisador, alias, canonico):
+    assert analisador.canonizar_suplemento(alias) == canonico
+    assert _nomes(analisador, alias) == ESPERADOS[canonico]
+    assert analisador.identificar_inibidores(alias) == analisador.identificar_inibidores(canonico)
+
+
+def test_indice_reconstruido_ao_recarregar_as_bases(ref):
+    analisador = ref.AnalisadorBiodisponibilidade(verbose=False, carregamento_sob_demanda=True)
+    assert _nomes(analisador, 'Zinc')[0] == []
+    
+    potencializadores = {
+        'universais': {
+            'histidina': {'aplicavel_a': ['Zinco'], 'mecanismo': 'Quelação', 'aumento_absorcao': '30-50%',
+                          'dose_tipica': '50-100mg'}
+        },
+        'especificos': {}
+    }
+    analisador.recarregar_bases_conhecimento({'potencializadores': potencializadores})
+    
+    assert _nomes(analisador, 'zinco')[0] == ['histidina']
+    assert _nomes(analisador, 'Curcumin')[0] == []
+    # Inibidores (base não substituída) continuam indexados
+    assert _nomes(analisador, 'Zinc')[1] == ESPERADOS['Zinc'][1]
+
+
+def test_suplemento_desconhecido(analisador):
+    assert _nomes(analisador, 'Suplemento Inexistente') == ([], [])
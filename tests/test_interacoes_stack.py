@@ -0,0 +1,88 @@
+import itertools
+import random
+
+import pytest
+
+STACK = ['Iron', 'Zinc', 'Calcium', 'Vitamin D', 'Curcumin', 'Vitamin C', 'Magnesium', 'Piperine', 'Omega-3',
+         'Vitamin K', 'Quercetin', 'Folate']
+
+
+@pytest.fixture(scope='module')
+def analisador(ref):
+    return ref.AnalisadorBiodisponibilidade(verbose=False)
+
+
+def _pares(resultado):
+    """Registros do stack como (par não ordenado, tipo, origem, chave), independentes da ordem"""
+    return sorted(
+        (tuple(sorted((item['a'], item['b']))), item['tipo'], item['origem'], item['chave'])
+        for item in resultado['conflitos'] + resultado['sinergias']
+    )
+
+
+def test_conflitos_e_sinergias_conhecidos(analisador):
+    resultado = analisador.analisar_interacoes_stack(['Iron', 'Zinc', 'Calcium', 'Vitamin D', 'Vitamin C'])
+    matriz = resultado['matriz']
+    
+    assert matriz['Iron']['Zinc'] == matriz['Zinc']['Iron'] == 'conflito'
+    assert matriz['Iron']['Calcium'] == 'conflito'
+    assert matriz['Calcium']['Vitamin D'] == 'sinergia'
+    assert matriz['Iron']['Vitamin C'] == 'sinergia'
+    assert 'Vitamin D' not in matriz['Iron']
+    competicao = [item for item in resultado['conflitos'] if item['chave'] == 'ferro_vs_zinco']
+    assert len(competicao) == 1
+    assert competicao[0]['separacao_minutos'] == 120
+    assert resultado['alertas_alimentares']['Iron'] == ['fitatos', 'oxalatos', 'taninos']
+
+
+def test_igual_a_comparacao_par_a_par(analisador):
+    resultado = analisador.analisar_interacoes_stack(STACK)
+    esperado = sorted(
+        par for a, b in itertools.combinations(STACK, 2)
+        for par in _pares(analisador.analisar_interacoes_stack([a, b]))
+    )
+    
+    assert _pares(resultado) == esperado
+    for a, b in itertools.combinations(STACK, 2):
+        dupla = analisador.analisar_interacoes_stack([a, b])['matriz']
+        assert resultado['matriz'].get(a, {}).get(b) == dupla.get(a, {}).get(b)
+
+
+def test_matriz_simetrica_e_consistente_com_os_registros(analisador):
+    resultado = analisador.analisar_interacoes_stack(STACK)
+    tipos = {}
+    for par, tipo, _, _ in _pares(resultado):
+        tipos.setdefault(par, set()).add(tipo)
+    
+    celulas = {(a, b): resumo for a, linha in resultado['matriz'].items() for b, resumo in linha.items()}
+    for (a, b), resumo in celulas.items():
+        assert celulas[(b, a)] == resumo
+        assert resumo == '+'.join(sorted(tipos[tuple(sorted((a, b)))]))
+    assert len(celulas) == 2 * len(tipos)
+
+
+def test_ordem_e_aliases_nao_alteram_o_resultado(analisador):
+    embaralhado = STACK[:]
+    random.Random(3).shuffle(embaralhado)
+    # Nomes em português e repetidos resolvem para o mesmo ID canônico
+    com_aliases = embaralhado + ['ferro', 'zinco', 'Iron']
+    resultado = analisador.analisar_interacoes_stack(com_aliases)
+    
+    assert resultado['suplementos'] == embaralhado
+    assert _pares(resultado) == _pares(analisador.analisar_interacoes_stack(STACK))
+    assert resultado['matriz'] == analisador.analisar_interacoes_stack(STACK)['matriz']
+
+
+def test_stack_sem_interacoes(analisador):
+    resultado = analisador.analisar_interacoes_stack(['Curcumin'])
+    assert resultado['conflitos'] == resultado['sinergias'] == []
+    assert resultado['matriz'] == {}
+
+
+@pytest.mark.parametrize('modo', ['thread', 'processo'])
+def test_lote_igual_a_chamadas_individuais(analisador, modo):
+    gerador = random.Random(8)
+    stacks = [gerador.sample(STACK, gerador.randint(1, 6)) for _ in range(40)]
+    resultados = analisador.analisar_stacks_lote(stacks, workers=2, modo=modo, tamanho_bloco=7)
+    
+    assert resultados == [analisador.analisar_interacoes_stack(stack) for stack in stacks]
@@ -0,0 +1,65 @@
+import copy
+
+import pytest
+
+
+@pytest.fixture(scope='module')
+def bases(benchmarks):
+    return benchmarks.gerar_kb_sintetica(40, semente=9)
+
+
+def _analisador(ref, conteudo):
+    analisador = ref.AnalisadorBiodisponibilidade(verbose=False, carregamento_sob_demanda=True)
+    analisador.recarregar_bases_conhecimento(conteudo)
+    return analisador
+
+
+def _comparavel(ref, tabela):
+    dados = ref._ler_dados_tabela(tabela.caminho)
+    del dados['criado_em'], dados['recalculo']
+    return dados
+
+
+def _editar_forma(editada, nome):
+    forma = next(iter(editada['formas_farmaceuticas'][nome]['formas_disponiveis'].values()))
+    forma['biodisponibilidade'] = round(forma['biodisponibilidade'] * 1.5, 2)
+
+
+def _editar_timing(editada, nome):
+    editada['timing_circadiano'][nome]['horario_ideal'] = '21:00-22:00'
+
+
+def _remover_forma(editada, nome):
+    formas = editada['formas_farmaceuticas'][nome]['formas_disponiveis']
+    del formas[list(formas)[-1]]
+
+
+@pytest.mark.parametrize('editar', [_editar_forma, _editar_timing, _remover_forma])
+def test_incremental_igual_a_materializacao_completa(ref, bases, tmp_path, editar):
+    nome = sorted(bases['formas_farmaceuticas'])[7]
+    editada = copy.deepcopy(bases)
+    editar(editada, nome)
+    caminho = tmp_path / 'tabela.json.gz'
+    _analisador(ref, bases).materializar_tabela(caminho)
+    
+    incremental = _analisador(ref, editada).materializar_tabela(caminho, incremental=True)
+    completa = _analisador(ref, editada).materializar_tabela(tmp_path / 'completa.json.gz')
+    
+    assert incremental.recalculo['incremental']
+    assert incremental.recalculo['suplementos_recalculados'] == 1
+    assert _comparavel(ref, incremental) == _comparavel(ref, completa)
+    for perfil in (None, {'idade': 70}):
+        servida = incremental.analise(nome, perfil_usuario=perfil)
+        esperada = completa.analise(nome, perfil_usuario=perfil)
+        del servida['timestamp'], esperada['timestamp']
+        assert servida == esperada
+
+
+def test_incremental_sem_edicoes_nao_recalcula(ref, bases, tmp_path):
+    caminho = tmp_path / 'tabela.json.gz'
+    completa = _analisador(ref, bases).materializar_tabela(caminho)
+    incremental = _analisador(ref, bases).materializar_tabela(caminho, incremental=True)
+    
+    assert incremental.recalculo['suplementos_recalculados'] == 0
+    assert incremental.recalculo['buckets_recalculados'] == 0
+    assert _comparavel(ref, incremental) == _comparavel(ref, completa)
@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+
+
+@pytest.fixture(scope='module')
+def cenario(ref, benchmarks):
+    analisador = ref.AnalisadorBiodisponibilidade(verbose=False, carregamento_sob_demanda=True)
+    analisador.recarregar_bases_conhecimento(benchmarks.gerar_kb_sintetica(30, semente=3))
+    precos = benchmarks.gerar_tabela_precos(analisador, 3)
+    nomes = list(analisador.formas_farmaceuticas)
+    stacks = [nomes[i:i + 3] for i in range(0, 12, 3)]
+    return analisador, precos, stacks
+
+
+@pytest.mark.parametrize('orcamento', [80.0, 80, np.float64(80.0), np.float32(80.0), np.int64(80), np.array(80.0)])
+def test_orcamento_escalar_vale_para_todos_os_stacks(cenario, orcamento):
+    analisador, precos, stacks = cenario
+    resultados = analisador.otimizar_formas_stacks_lote(stacks, precos, orcamento)
+    
+    assert len(resultados) == len(stacks)
+    assert resultados == analisador.otimizar_formas_stacks_lote(stacks, precos, [80.0] * len(stacks))
+
+
+@pytest.mark.parametrize('quantidade', [1, 5])
+def test_quantidade_de_orcamentos_diferente_dos_stacks(cenario, quantidade):
+    analisador, precos, stacks = cenario
+    with pytest.raises(ValueError):
+        analisador.otimizar_formas_stacks_lote(stacks, precos, [80.0] * quantidade)
+
+
+def test_orcamentos_em_array_numpy(cenario):
+    analisador, precos, stacks = cenario
+    orcamentos = np.linspace(20.0, 120.0, len(stacks))
+    assert analisador.otimizar_formas_stacks_lote(stacks, precos, orcamentos) == [
+        analisador.otimizar_formas_stack(stack, precos, float(orcamento))
+        for stack, orcamento in zip(stacks, orcamentos)
+    ]
+
+
+@pytest.mark.parametrize('orcamento', [float('nan'), np.nan, -5, -0.01, float('inf'), np.inf, '80', None])
+def test_orcamento_escalar_invalido(cenario, orcamento):
+    analisador, precos, stacks = cenario
+    with pytest.raises(ValueError):
+        analisador.otimizar_formas_stacks_lote(stacks, precos, orcamento)
+
+
+@pytest.mark.parametrize('invalido', [float('nan'), -5, float('inf'), '80'])
+def test_orcamento_invalido_na_lista(cenario, invalido):
+    analisador, precos, stacks = cenario
+    orcamentos = [80.0] * (len(stacks) - 1) + [invalido]
+    with pytest.raises(ValueError):
+        analisador.otimizar_formas_stacks_lote(stacks, precos, orcamentos)
+    with pytest.raises(ValueError):
+        analisador.otimizar_formas_stacks_lote(stacks, precos, np.array(orcamentos, dtype=object))
+    with pytest.raises(ValueError):
+        analisador.otimizar_formas_stack(stacks[0], precos, invalido)
+
+
+def test_orcamento_zero_e_valido(cenario):
+    analisador, precos, stacks = cenario
+    resultados = analisador.otimizar_formas_stacks_lote(stacks, precos, 0)
+    assert [resultado['orcamento'] for resultado in resultados] == [0] * len(stacks)
+    assert not any(resultado['viavel'] for resultado in resultados)
@@ -0,0 +1,100 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+
+@pytest.fixture(scope='module')
+def analisador(ref):
+    return ref.AnalisadorBiodisponibilidade(verbose=False, carregamento_sob_demanda=True)
+
+
+@pytest.fixture(scope='module')
+def perfis(benchmarks):
+    # Idades limite, marcadores conhecidos/desconhecidos, aliases com acento/maiúsculas e perfis vazios
+    fixos = [
+        {}, None,
+        {'idade': 0}, {'idade': 12.9}, {'idade': 13}, {'idade': 17.5}, {'idade': 18}, {'idade': 64.9}, {'idade': 65},
+        {'condicoes_gastro': ['hipocloridria', 'desconhecida']},
+        {'idade': 70, 'condicoes_gastro': ['Doença Celíaca'], 'estilo_vida': ['vegano', 'fumante']},
+        {'idade': 10, 'estilo_vida': ['atleta', 'atleta']},
+        {'idade': 40, 'condicoes_gastro': [], 'estilo_vida': []},
+    ]
+    return fixos + benchmarks.gerar_perfis_aleatorios(500, semente=3)
+
+
+def _esperado(analisador, perfis):
+    return [analisador.gerar_recomendacoes_personalizadas(None, perfil) if perfil else {} for perfil in perfis]
+
+
+def _linhas(analisador, colunas, total):
+    return [analisador.recomendacoes_da_linha(colunas, i) for i in range(total)]
+
+
+def test_lista_de_dicts(analisador, perfis):
+    colunas = analisador.gerar_recomendacoes_personalizadas_lote(perfis)
+    
+    assert _linhas(analisador, colunas, len(perfis)) == _esperado(analisador, perfis)
+    assert colunas['bucket'].tolist() == [analisador.bucket_perfil(perfil or {}) for perfil in perfis]
+
+
+def test_dataframe_com_colunas_de_listas(analisador, perfis):
+    preenchidos = [perfil for perfil in perfis if perfil]
+    quadro = pd.DataFrame({
+        'idade': [perfil.get('idade', 30) for perfil in preenchidos],
+        'condicoes_gastro': [perfil.get('condicoes_gastro', []) for perfil in preenchidos],
+        'estilo_vida': [perfil.get('estilo_vida', []) for perfil in preenchidos],
+    })
+    colunas = analisador.gerar_recomendacoes_personalizadas_lote(quadro)
+    
+    assert _linhas(analisador, colunas, len(preenchidos)) == _esperado(analisador, preenchidos)
+
+
+def test_dataframe_com_colunas_booleanas(ref, analisador, perfis):
+    preenchidos = [perfil for perfil in perfis if perfil]
+    quadro = pd.DataFrame({'idade': [perfil.get('idade', 30) for perfil in preenchidos]})
+    for campo, valor in analisador.marcadores_perfil():
+        quadro[valor] = [
+            valor in map(ref.normalizar_nome, perfil.get(campo, [])) for perfil in preenchidos
+        ]
+    colunas = analisador.gerar_recomendacoes_personalizadas_lote(quadro)
+    
+    assert _linhas(analisador, colunas, len(preenchidos)) == _esperado(analisador, preenchidos)
+
+
+def test_colunas_de_listas_com_celulas_ausentes(analisador):
+    colunas = analisador.gerar_recomendacoes_personalizadas_lote({
+        'idade': np.array([30.0, 70.0, 15.0]),
+        'condicoes_gastro': [None, ['hipocloridria'], np.nan],
+        'estilo_vida': [('vegano',), [], None],
+    })
+    perfis = [
+        {'idade': 30, 'estilo_vida': ['vegano']},
+        {'idade': 70, 'condicoes_gastro': ['hipocloridria']},
+        {'idade': 15},
+    ]
+    assert _linhas(analisador, colunas, 3) == _esperado(analisador, perfis)
+
+
+def test_lote_vazio(analisador):
+    colunas = analisador.gerar_recomendacoes_personalizadas_lote([])
+    assert colunas['bucket'].shape == (0,)
+    assert colunas['personalizado'].shape == (0,)
+
+
+@pytest.mark.parametrize('idade', [-1, -0.5, float('nan'), float('inf'), None, 'abc'])
+def test_idade_invalida_e_rejeitada(ref, analisador, idade):
+    perfil = {'idade': idade}
+    with pytest.raises(ref.PerfilInvalido):
+        analisador.gerar_recomendacoes_personalizadas(None, perfil)
+    with pytest.raises(ref.PerfilInvalido):
+        analisador.analisar_biodisponibilidade_suplemento('magnesio', perfil_usuario=perfil)
+    with pytest.raises(ref.PerfilInvalido):
+        analisador.gerar_recomendacoes_personalizadas_lote([{'idade': 30}, perfil])
+    with pytest.raises(ref.PerfilInvalido):
+        analisador.gerar_recomendacoes_personalizadas_lote(pd.DataFrame({'idade': [30, idade]}))
+
+
+def test_menores_de_18_recebem_dose_pediatrica(analisador):
+    for idade in (0, 5, 12.99, 13, 17.9):
+        recomendacoes = analisador.gerar_recomendacoes_personalizadas(None, {'idade': idade})
+        assert recomendacoes['ajustes_dose'] == 'Dose pediátrica (consultar pediatra)', idade
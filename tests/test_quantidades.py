@@ -0,0 +1,78 @@
+import pytest
+
+
+@pytest.mark.parametrize('texto, esperado', [
+    ('300-2000%', (300.0, 2000.0, '%')),
+    ('5-20mg', (5.0, 20.0, 'mg')),
+    ('2-3h', (2.0, 3.0, 'h')),
+    ('Separar por 2-3h', (2.0, 3.0, 'h')),
+    ('Separar por 2h', (2.0, 2.0, 'h')),
+    ('Curta (1-3h)', (1.0, 3.0, 'h')),
+    ('2,5-3,5 g', (2.5, 3.5, 'g')),
+    ('2 h – 4 h', (2.0, 4.0, 'h')),
+    ('30 min', (30.0, 30.0, 'min')),
+    ('10x', (10.0, 10.0, 'x')),
+    # Unidades equivalentes
+    ('1000 IU', (1000.0, 1000.0, 'ui')),
+    ('50µg', (50.0, 50.0, 'mcg')),
+    # Limites com unidades diferentes: convertidos para a unidade do inferior
+    ('500mg-1g', (500.0, 1000.0, 'mg')),
+    ('200mcg-1mg', (200.0, 1000.0, 'mcg')),
+    ('30min-1h', (30.0, 60.0, 'min')),
+    ('Tomar 1 g - 2 g ao dia', (1.0, 2.0, 'g')),
+    # Unidades não comparáveis: só o limite inferior
+    ('5mg-10%', (5.0, 5.0, 'mg')),
+])
+def test_interpretar_quantidade(ref, texto, esperado):
+    faixa = ref.interpretar_quantidade(texto)
+    assert isinstance(faixa, ref.FaixaNumerica)
+    assert (faixa.minimo, faixa.maximo) == pytest.approx(esperado[:2])
+    assert faixa.unidade == esperado[2]
+
+
+@pytest.mark.parametrize('texto', ['sem número', '3 gotas', 'Vitamina B12', 'Tomar com refeição', ''])
+def test_texto_sem_quantidade(ref, texto):
+    assert ref.interpretar_quantidade(texto) is None
+
+
+def test_interpretar_equivalencia(ref):
+    dose, referencia = ref.interpretar_equivalencia('2.6mg = 15mg óxido')
+    assert tuple(dose) == (2.6, 2.6, 'mg')
+    assert tuple(referencia) == (15.0, 15.0, 'mg')
+    assert ref.interpretar_equivalencia('15mg óxido') is None
+    assert ref.interpretar_equivalencia('2.6mg = óxido') is None
+
+
+def test_bases_embutidas_totalmente_interpretadas(ref):
+    analisador = ref.AnalisadorBiodisponibilidade(verbose=False)
+    relatorio = analisador.relatorio_normalizacao()
+    
+    assert relatorio['nao_interpretados'] == []
+    assert relatorio['interpretados'] >= 90
+    assert tuple(analisador.quantidade('potencializadores', 'universais', 'piperina', 'aumento_absorcao')) == (
+        300.0, 2000.0, '%'
+    )
+    assert tuple(analisador.quantidade('inibidores_absorcao', 'medicamentos', 'antiácidos', 'solucao')) == (
+        2.0, 3.0, 'h'
+    )
+    assert analisador.quantidade('potencializadores', 'universais', 'piperina', 'mecanismo') is None
+
+
+def test_campo_obrigatorio_nao_interpretado_relatado(ref):
+    analisador = ref.AnalisadorBiodisponibilidade(verbose=False, carregamento_sob_demanda=True)
+    potencializadores = {
+        'universais': {
+            'piperina': {'aplicavel_a': ['Curcumina'], 'mecanismo': 'Inibição CYP450',
+                         'aumento_absorcao': 'muito alto', 'dose_tipica': '500mg-1g'}
+        },
+        'especificos': {}
+    }
+    analisador.recarregar_bases_conhecimento({'potencializadores': potencializadores})
+    relatorio = analisador.relatorio_normalizacao()
+    
+    assert {'caminho': 'potencializadores.universais.piperina.aumento_absorcao', 'texto': 'muito alto'} in (
+        relatorio['nao_interpretados']
+    )
+    assert tuple(analisador.quantidade('potencializadores', 'universais', 'piperina', 'dose_tipica')) == (
+        500.0, 1000.0, 'mg'
+    )
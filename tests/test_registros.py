@@ -0,0 +1,73 @@
+import json
+import pickle
+
+import pytest
+
+
+@pytest.fixture(scope='module')
+def analisador(ref):
+    return ref.AnalisadorBiodisponibilidade(verbose=False, carregamento_sob_demanda=True)
+
+
+def _somente_tipos_basicos(valor):
+    """Só dicts, listas e escalares (tuplas apenas nos pares do ranking de formas)"""
+    if isinstance(valor, dict):
+        return type(valor) is dict and all(_somente_tipos_basicos(item) for item in valor.values())
+    if isinstance(valor, list):
+        return all(_somente_tipos_basicos(item) for item in valor)
+    return isinstance(valor, (str, int, float, bool, type(None)))
+
+
+def test_janela_timing_nao_expoe_dicts_da_base(ref, analisador):
+    suplemento = next(nome for nome, dados in analisador.timing_circadiano.items() if dados.get('ajustes_especiais'))
+    janela = ref.JanelaTiming.de_dict(analisador.timing_circadiano[suplemento])
+    
+    with pytest.raises(TypeError):
+        janela['fatores_timing']['refeicoes'] = 'alterado'
+    with pytest.raises(TypeError):
+        janela.ajustes_especiais['novo'] = 'alterado'
+    assert dict(janela.ajustes_especiais) == analisador.timing_circadiano[suplemento]['ajustes_especiais']
+
+
+def test_registros_congelados_sobrevivem_a_pickle(ref, analisador):
+    suplemento = next(iter(analisador.timing_circadiano))
+    janela = ref.JanelaTiming.de_dict(analisador.timing_circadiano[suplemento])
+    copia = pickle.loads(pickle.dumps(janela))
+    
+    assert dict(copia) == dict(janela)
+    assert dict(copia['fatores_timing']) == dict(janela['fatores_timing'])
+
+
+def test_potencializadores_e_inibidores_como_listas_de_dicts(analisador):
+    potencializadores = analisador.identificar_potencializadores('curcumina')
+    piperina = analisador.potencializadores['universais']['piperina']
+    
+    assert type(potencializadores) is list
+    assert {'nome': 'piperina', 'aumento_absorcao': piperina['aumento_absorcao'],
+            'dose_recomendada': piperina['dose_tipica'], 'mecanismo': piperina['mecanismo']} in potencializadores
+    inibidores = analisador.identificar_inibidores('Iron')
+    assert type(inibidores) is list and all(type(inibidor) is dict for inibidor in inibidores)
+    fitatos = next(inibidor for inibidor in inibidores if inibidor.get('nome') == 'fitatos')
+    assert fitatos['fontes'] == analisador.inibidores_absorcao['quelantes_naturais']['fitatos']['fontes']
+    assert analisador.identificar_potencializadores('Suplemento Inexistente') == []
+
+
+def test_analises_em_tipos_basicos(analisador):
+    formas = analisador.analisar_formas_farmaceuticas('Magnesium')
+    ranking = formas['ranking_biodisponibilidade']
+    
+    # Ranking: pares (forma, dados) sobre os mesmos dicts de formas_disponiveis
+    assert type(ranking) is list and all(type(par) is tuple for par in ranking)
+    assert all(dados is formas['formas_disponiveis'][nome] for nome, dados in ranking)
+    assert formas['formas_disponiveis'] == analisador.formas_farmaceuticas['Magnesium']['formas_disponiveis']
+    assert _somente_tipos_basicos(dict(formas, ranking_biodisponibilidade=[list(par) for par in ranking]))
+    
+    analise = analisador.analisar_biodisponibilidade_suplemento('ferro', perfil_usuario={'idade': 70})
+    analise['analise_formas_farmaceuticas'] = dict(
+        analise['analise_formas_farmaceuticas'],
+        ranking_biodisponibilidade=[list(par) for par in analise['analise_formas_farmaceuticas']
+                                    ['ranking_biodisponibilidade']]
+    )
+    assert _somente_tipos_basicos(analise)
+    # Mesmo conteúdo da serialização (só pares do ranking viram listas)
+    assert json.loads(json.dumps(analise)) == analise
@@ -0,0 +1,93 @@
+import itertools
+import math
+
+import numpy as np
+import pandas as pd
+import pytest
+
+COLUNAS = ('max_biodisponibilidade', 'tem_timing', 'num_potencializadores', 'num_inibidores', 'personalizado')
+
+
+@pytest.fixture(scope='module')
+def analisador(ref):
+    return ref.AnalisadorBiodisponibilidade(verbose=False, carregamento_sob_demanda=True)
+
+
+def _analise_minima(max_bio, tem_timing, num_potencializadores, num_inibidores, personalizado):
+    """Análise com apenas os campos lidos pelo score escalar"""
+    return {
+        'analise_formas_farmaceuticas': (
+            {} if math.isnan(max_bio)
+            else {'formas_disponiveis': {'padrao': {'biodisponibilidade': 1.0}, 'forma': {'biodisponibilidade': max_bio}}}
+        ),
+        'timing_otimizado': {'timing_otimo': 'manha'} if tem_timing else {},
+        'potencializadores_recomendados': [{}] * num_potencializadores,
+        'inibidores_evitar': [{}] * num_inibidores,
+        'recomendacoes_personalizadas': {'forma_recomendada': 'x'} if personalizado else {},
+    }
+
+
+# Bordas do bônus de forma (<= 1.0, frações .5 no arredondamento, teto de 30) e dos limites de contagem
+LINHAS = list(itertools.product(
+    [math.nan, 0.0, 0.5, 1.0, 1.05, 1.15, 1.25, 2.0, 3.95, 4.0, 185.0],
+    [False, True],
+    [0, 1, 4, 6],
+    [0, 1, 5, 7],
+    [False, True],
+))
+
+
+def test_paridade_linha_a_linha(analisador):
+    colunas = {nome: np.array(valores) for nome, valores in zip(COLUNAS, zip(*LINHAS))}
+    vetorizado = analisador.calcular_score_biodisponibilidade_lote(**colunas)
+    escalar = [analisador.calcular_score_biodisponibilidade(_analise_minima(*linha)) for linha in LINHAS]
+    
+    assert vetorizado.dtype == np.int64
+    for linha, esperado, obtido in zip(LINHAS, escalar, vetorizado):
+        assert obtido == esperado, linha
+
+
+def test_paridade_colunas_dataframe(analisador):
+    quadro = pd.DataFrame(LINHAS, columns=COLUNAS)
+    vetorizado = analisador.calcular_score_biodisponibilidade_lote(**{nome: quadro[nome] for nome in COLUNAS})
+    escalar = [analisador.calcular_score_biodisponibilidade(_analise_minima(*linha)) for linha in LINHAS]
+    assert vetorizado.tolist() == escalar
+
+
+def test_quadro_vazio(analisador):
+    quadro = pd.DataFrame({nome: pd.Series([], dtype=float) for nome in COLUNAS})
+    vetorizado = analisador.calcular_score_biodisponibilidade_lote(**{nome: quadro[nome] for nome in COLUNAS})
+    assert vetorizado.shape == (0,)
+    
+    colunas = analisador.extrair_colunas_score([])
+    assert analisador.calcular_score_biodisponibilidade_lote(**colunas).shape == (0,)
+
+
+def test_coluna_ausente_e_rejeitada(analisador):
+    colunas = {nome: np.zeros(3) for nome in COLUNAS if nome != 'num_inibidores'}
+    with pytest.raises(TypeError):
+        analisador.calcular_score_biodisponibilidade_lote(**colunas)
+
+
+def test_nan_equivale_a_sem_formas(analisador):
+    comum = {'tem_timing': [True, True], 'num_potencializadores': [2, 2],
+             'num_inibidores': [1, 1], 'personalizado': [False, False]}
+    sem_formas = analisador.calcular_score_biodisponibilidade_lote(max_biodisponibilidade=[math.nan, 1.0], **comum)
+    assert sem_formas[0] == sem_formas[1] == analisador.calcular_score_biodisponibilidade(
+        _analise_minima(math.nan, True, 2, 1, False)
+    )
+
+
+def test_paridade_com_analises_reais(analisador):
+    perfis = [None, {'idade': 70, 'condicoes_gastro': ['acloridria']}, {'idade': 25, 'estilo_vida': ['ativo']}]
+    # Inclui suplementos desconhecidos (análise vazia) e aliases
+    suplementos = ['vitamina_d3', 'magnesio', 'Curcumin', 'ferro', 'suplemento_inexistente', '', 'CoQ10']
+    analises = [
+        analisador.analisar_biodisponibilidade_suplemento(suplemento, perfil_usuario=perfil)
+        for suplemento in suplementos for perfil in perfis
+    ]
+    colunas = analisador.extrair_colunas_score(analises)
+    vetorizado = analisador.calcular_score_biodisponibilidade_lote(**colunas)
+    
+    assert vetorizado.tolist() == [analise['score_biodisponibilidade'] for analise in analises]
+    assert vetorizado.tolist() == [analisador.calcular_score_biodisponibilidade(analise) for analise in analises]
@@ -0,0 +1,65 @@
+import asyncio
+import json
+
+import pytest
+
+
+async def _requisicao(porta, metodo, alvo, corpo=b'', tamanho=None, conexao='close'):
+    leitor, escritor = await asyncio.open_connection('127.0.0.1', porta)
+    tamanho = len(corpo) if tamanho is None else tamanho
+    escritor.write(
+        f"{metodo} {alvo} HTTP/1.1\r\nHost: teste\r\nContent-Length: {tamanho}\r\n"
+        f"Connection: {conexao}\r\n\r\n".encode('latin-1') + corpo
+    )
+    await escritor.drain()
+    # Sem timeout, uma conexão que o servidor não encerra travaria o teste
+    resposta = await asyncio.wait_for(leitor.read(), timeout=5)
+    escritor.close()
+    cabecalho, _, conteudo = resposta.partition(b'\r\n\r\n')
+    return int(cabecalho.split()[1]), json.loads(conteudo)
+
+
+async def _respostas(ref, modulo_servico, requisicoes):
+    analisador = ref.AnalisadorBiodisponibilidade(verbose=False, carregamento_sob_demanda=True)
+    servico = modulo_servico.ServidorBiodisponibilidade(analisador, workers=1, modo='thread', janela_ms=0.5)
+    servidor = await servico.iniciar('127.0.0.1', 0)
+    porta = servidor.sockets[0].getsockname()[1]
+    try:
+        return [await _requisicao(porta, *requisicao) for requisicao in requisicoes]
+    finally:
+        servidor.close()
+        servico._tarefa_despachante.cancel()
+        servico._executor.shutdown(wait=False, cancel_futures=True)
+
+
+@pytest.mark.parametrize('idade', ['abc', 'nan', 'inf', '-3'])
+def test_idade_invalida_na_consulta_retorna_400(ref, servico, idade):
+    (status, resposta), = asyncio.run(_respostas(ref, servico, [('GET', f'/suplementos/magnesio?idade={idade}')]))
+    assert status == 400
+    assert 'erro' in resposta
+
+
+def test_idade_invalida_no_corpo_retorna_400(ref, servico):
+    corpo = json.dumps({'suplemento': 'magnesio', 'perfil_usuario': {'idade': -1}}).encode()
+    (status, resposta), = asyncio.run(_respostas(ref, servico, [('POST', '/analise', corpo)]))
+    assert status == 400
+    assert 'erro' in resposta
+
+
+@pytest.mark.parametrize('tamanho', ['abc', '-1', '+2', '1.5', '1_0', '²'])
+def test_content_length_invalido_retorna_400_e_encerra(ref, servico, tamanho):
+    corpo = json.dumps({'suplemento': 'magnesio'}).encode()
+    (status, resposta), (_, metricas) = asyncio.run(_respostas(ref, servico, [
+        ('POST', '/analise', corpo, tamanho, 'keep-alive'),
+        ('GET', '/metricas')
+    ]))
+    assert status == 400
+    assert 'Content-Length' in resposta['erro']
+    assert metricas['por_status'] == {'400': 1}
+
+
+def test_consulta_valida(ref, servico):
+    (status, resposta), = asyncio.run(_respostas(ref, servico, [('GET', '/suplementos/magnesio?idade=70')]))
+    assert status == 200
+    assert resposta['suplemento'] == 'magnesio'
+    assert resposta['recomendacoes_personalizadas']
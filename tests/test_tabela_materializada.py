@@ -0,0 +1,114 @@
+import gzip
+import json
+
+import pytest
+
+
+def _sem_timestamp(analise):
+    return {campo: valor for campo, valor in analise.items() if campo != 'timestamp'}
+
+
+@pytest.fixture(scope='module')
+def embutido(ref):
+    return ref.AnalisadorBiodisponibilidade(verbose=False, carregamento_sob_demanda=True)
+
+
+@pytest.fixture(scope='module')
+def perfis(benchmarks):
+    return [None, {}, {'idade': 70}] + benchmarks.gerar_perfis_aleatorios(60, semente=5)
+
+
+@pytest.mark.parametrize('nome', ['tabela.json', 'tabela.json.gz'])
+def test_tabela_igual_ao_calculo_online(ref, embutido, perfis, tmp_path, nome):
+    caminho = tmp_path / nome
+    embutido.materializar_tabela(caminho)
+    tabela = ref.TabelaMaterializada.carregar(caminho)
+    
+    assert tabela.hash_kb == embutido.hash_kb()
+    suplementos = sorted({*embutido.formas_farmaceuticas, *embutido.timing_circadiano, *embutido.interacoes_alimentares})
+    for suplemento in suplementos:
+        for perfil in perfis:
+            servida = tabela.analise(suplemento, 'anemia', perfil)
+            esperada = embutido.analisar_biodisponibilidade_suplemento(suplemento, 'anemia', perfil)
+            assert _sem_timestamp(servida) == _sem_timestamp(esperada)
+
+
+@pytest.mark.parametrize('nome, comprimido', [('tabela.json', False), ('tabela.json.gz', True)])
+def test_arquivo_gravado_no_formato_do_nome(ref, embutido, tmp_path, nome, comprimido):
+    caminho = tmp_path / nome
+    embutido.materializar_tabela(caminho)
+    conteudo = caminho.read_bytes()
+    
+    assert (conteudo[:2] == b'\x1f\x8b') is comprimido
+    dados = json.loads(gzip.decompress(conteudo) if comprimido else conteudo)
+    assert dados['formato'] == ref.FORMATO_TABELA_MATERIALIZADA
+    assert dados['hash_kb'] == embutido.hash_kb()
+
+
+def test_tabela_de_kb_sintetica(ref, benchmarks, perfis, tmp_path):
+    analisador = ref.AnalisadorBiodisponibilidade(verbose=False, carregamento_sob_demanda=True)
+    bases = benchmarks.gerar_kb_sintetica(30, semente=4)
+    analisador.recarregar_bases_conhecimento(bases)
+    tabela = analisador.materializar_tabela(tmp_path / 'tabela.json.gz')
+    carregada = ref.TabelaMaterializada.carregar(tmp_path / 'tabela.json.gz')
+    
+    assert len(carregada) == len(tabela) > 0
+    for suplemento in sorted(bases['formas_farmaceuticas']):
+        for perfil in perfis:
+            servida = carregada.analise(suplemento, perfil_usuario=perfil)
+            esperada = analisador.analisar_biodisponibilidade_suplemento(suplemento, perfil_usuario=perfil)
+            assert _sem_timestamp(servida) == _sem_timestamp(esperada)
+
+
+def test_aliases_e_suplemento_ausente(ref, embutido, tmp_path):
+    tabela = embutido.materializar_tabela(tmp_path / 'tabela.json.gz')
+    
+    # Nome em português servido com o nome pedido, como no cálculo online
+    servida = tabela.analise('magnesio', perfil_usuario={'idade': 70})
+    esperada = embutido.analisar_biodisponibilidade_suplemento('magnesio', perfil_usuario={'idade': 70})
+    assert servida['suplemento'] == 'magnesio'
+    assert _sem_timestamp(servida) == _sem_timestamp(esperada)
+    assert tabela.analise('Suplemento Inexistente') is None
+
+
+def test_analisador_servido_pela_tabela(ref, embutido, perfis, tmp_path):
+    caminho = tmp_path / 'tabela.json.gz'
+    embutido.materializar_tabela(caminho)
+    analisador = ref.AnalisadorBiodisponibilidade(verbose=False, carregamento_sob_demanda=True,
+                                                  tabela_materializada=caminho)
+    
+    for suplemento in ['Magnesium', 'ferro', 'Curcumin']:
+        for perfil in perfis[:10]:
+            servida = analisador.analisar_biodisponibilidade_suplemento(suplemento, perfil_usuario=perfil)
+            esperada = embutido.analisar_biodisponibilidade_suplemento(suplemento, perfil_usuario=perfil)
+            assert _sem_timestamp(servida) == _sem_timestamp(esperada)
+    # Suplemento fora da tabela: cálculo online
+    assert analisador.analisar_biodisponibilidade_suplemento('Suplemento Inexistente') is not None
+
+
+def test_tabela_desatualizada_regenerada(ref, benchmarks, tmp_path):
+    caminho = tmp_path / 'tabela.json.gz'
+    analisador = ref.AnalisadorBiodisponibilidade(verbose=False, carregamento_sob_demanda=True)
+    analisador.materializar_tabela(caminho)
+    
+    bases = benchmarks.gerar_kb_sintetica(10, semente=6)
+    analisador.recarregar_bases_conhecimento(bases)
+    with pytest.raises(ValueError):
+        analisador.usar_tabela_materializada(caminho, regenerar=False)
+    
+    tabela = analisador.usar_tabela_materializada(caminho)
+    assert tabela.hash_kb == analisador.hash_kb()
+    assert ref.TabelaMaterializada.carregar(caminho).hash_kb == analisador.hash_kb()
+    nome = sorted(bases['formas_farmaceuticas'])[0]
+    assert tabela.analise(nome) is not None
+
+
+def test_formato_nao_suportado(ref, embutido, tmp_path):
+    caminho = tmp_path / 'tabela.json'
+    embutido.materializar_tabela(caminho)
+    dados = json.loads(caminho.read_text(encoding='utf-8'))
+    dados['formato'] = -1
+    caminho.write_text(json.dumps(dados), encoding='utf-8')
+    
+    with pytest.raises(ValueError):
+        ref.TabelaMaterializada.carregar(caminho)